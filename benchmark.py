@@ -0,0 +1,428 @@
+"""
+오프라인 end-to-end 벤치마크.
+
+실제 텔레그램/OpenAI/네이버 없이 로컬 대역(fake)으로
+generate_reports_stream → send_morning_snapshot 전체 파이프라인을 돌리고
+규모별로 소요 시간 / 첫 블록 전송까지 걸린 시간 / 최대 메모리 / 단계별 호출 수를 잰다.
+
+    python benchmark.py
+    python benchmark.py --sources 10,100,500 --messages 10,1000,5000 --llm-latency 0.2
+    python benchmark.py --json bench_output.txt
+    SUMMARY_STREAMING=1 python benchmark.py
+    POLL_ADAPTIVE=0 python benchmark.py   # warm 실행에서도 모든 소스 확인 (조건부 요청 측정)
+    python benchmark.py --skew --llm-latency-per-1k 0.05   # 소스 크기가 제각각일 때 (SUMMARY_LPT=0 과 비교)
+    python benchmark.py --compare-extractive --llm-latency-per-1k 0.05   # 추출 압축 끔/켬 비교
+
+- 가짜 Telethon 클라이언트: iter_messages(limit, min_id) 지원
+- 가짜 LLM: 지정한 지연(+ 입력 1천 토큰당 지연) 후 고정 텍스트 + usage 반환 (stream=True 이면 문단별 delta 이벤트)
+- 로컬 RSS 서버: ETag / 304 지원
+- 가짜 Bot API: send_message / edit_message_text 호출만 기록
+메모리는 기본으로 프로세스 최대 RSS, --tracemalloc 이면 실행별 파이썬 힙 최대치.
+각 규모마다 cold(빈 저장소) 실행과 warm(바로 다시 실행) 실행을 함께 잰다.
+"""
+import os
+import sys
+import json
+import time
+import random
+import resource
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+_WORDS = (
+    "금리 반도체 환율 수출 실적 메모리 HBM 배터리 조선 방산 원전 유가 달러 엔화 "
+    "연준 물가 고용 소비 재고 가이던스 밸류에이션 수주 마진 공급망 관세 AI 데이터센터 "
+    "전력 구리 리튬 중국 미국 일본 유럽 신흥국 채권 크레딧 스프레드 유동성 모멘텀"
+).split()
+
+
+def _make_text(rng, n_words):
+    # 8~15 단어마다 문장을 끊는다 (추출 압축이 문장 단위로 고를 수 있도록)
+    sentences = []
+    while n_words > 0:
+        n = min(n_words, rng.randint(8, 15))
+        sentences.append(" ".join(rng.choice(_WORDS) for _ in range(n)) + ".")
+        n_words -= n
+    return " ".join(sentences)
+
+
+# -------------------------------------------------
+# 로컬 RSS 서버
+# -------------------------------------------------
+class _Feeds:
+    def __init__(self):
+        self.bodies = {}
+
+    def build(self, blog_ids, entries_per_blog, seed):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        self.bodies = {}
+        for blog_id in blog_ids:
+            items = []
+            for i in range(entries_per_blog):
+                published = now - timedelta(minutes=10 + i * (23 * 60 // max(entries_per_blog, 1)))
+                items.append(
+                    "<item>"
+                    f"<title>{blog_id} 글 {i}</title>"
+                    f"<link>https://blog.example/{blog_id}/{i}</link>"
+                    f"<guid>https://blog.example/{blog_id}/{i}</guid>"
+                    f"<description>{_make_text(rng, 40)}</description>"
+                    f"<pubDate>{format_datetime(published)}</pubDate>"
+                    "</item>"
+                )
+            body = (
+                '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+                f"<title>{blog_id}</title>{''.join(items)}</channel></rss>"
+            ).encode("utf-8")
+            self.bodies[blog_id] = body
+
+
+_feeds = _Feeds()
+_http_hits = Counter()
+
+
+class _RSSHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        blog_id = self.path.strip("/").removesuffix(".xml")
+        body = _feeds.bodies.get(blog_id)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            _http_hits["304"] += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        _http_hits["200"] += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_rss_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RSSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# -------------------------------------------------
+# 가짜 Telethon / LLM / Bot API
+# -------------------------------------------------
+class FakeTelegramClient:
+    def __init__(self):
+        self.channels = {}
+        self.calls = Counter()
+
+    def build(self, channels, messages_per_channel, seed, skew=False):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        self.channels = {}
+        base = messages_per_channel
+        for n, channel in enumerate(channels):
+            # skew: 채널 크기를 1/8 ~ 1배로 섞는다 (요약 비용이 제각각인 상황)
+            if skew:
+                messages_per_channel = max(1, base * (n % 8 + 1) // 8)
+            step = timedelta(hours=23) / max(messages_per_channel, 1)
+            msgs = []
+            for i in range(messages_per_channel):
+                msg_id = messages_per_channel - i
+                msgs.append(SimpleNamespace(
+                    id=msg_id,
+                    date=now - step * i,
+                    text=_make_text(rng, rng.randint(20, 200)),
+                    chat=SimpleNamespace(username=channel),
+                ))
+            self.channels[channel] = msgs  # 최신순
+
+    def is_connected(self):
+        return True
+
+    async def start(self):
+        return self
+
+    async def disconnect(self):
+        pass
+
+    async def iter_messages(self, channel, limit=None, min_id=0, **kwargs):
+        self.calls["iter_messages"] += 1
+        count = 0
+        for msg in self.channels.get(channel, []):
+            if msg.id <= min_id:
+                break
+            if limit is not None and count >= limit:
+                break
+            count += 1
+            if count % 100 == 1:
+                self.calls["history_pages"] += 1
+                await asyncio.sleep(0)
+            yield msg
+
+
+class FakeLLM:
+    def __init__(self, latency, latency_per_1k=0.0):
+        self.latency = latency
+        self.latency_per_1k = latency_per_1k
+        self.calls = 0
+        self.responses = self
+
+    OUTPUT = "벤치마크용 요약입니다.\n\n핵심 흐름 정리.\n\n전반적인 흐름 요약."
+
+    async def create(self, model=None, input=None, instructions=None, stream=False, **kwargs):
+        self.calls += 1
+        response = SimpleNamespace(
+            output_text=self.OUTPUT,
+            usage=SimpleNamespace(
+                input_tokens=len(input or "") // 2,
+                output_tokens=400,
+            ),
+        )
+        latency = self.latency + self.latency_per_1k * response.usage.input_tokens / 1000
+        if stream:
+            return self._stream(response, latency)
+        await asyncio.sleep(latency)
+        return response
+
+    async def _stream(self, response, latency):
+        # 응답 지연을 문단 수만큼 나눠 delta 이벤트로 흘려보낸다
+        paragraphs = self.OUTPUT.split("\n\n")
+        for i, paragraph in enumerate(paragraphs):
+            await asyncio.sleep(latency / len(paragraphs))
+            delta = paragraph if i == 0 else "\n\n" + paragraph
+            yield SimpleNamespace(type="response.output_text.delta", delta=delta)
+        yield SimpleNamespace(type="response.completed", response=response)
+
+
+class FakeBot:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.first_block_at = None
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls["send_message"] += 1
+        # 시작 안내 / 섹션 헤더를 뺀 첫 요약 블록이 나간 시각
+        if self.first_block_at is None and not text.startswith(("🗞️", "━")):
+            self.first_block_at = time.perf_counter()
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(message_id=self.calls["send_message"], chat_id=chat_id)
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        self.calls["edit_message_text"] += 1
+        await asyncio.sleep(self.latency)
+
+
+# -------------------------------------------------
+# 실행
+# -------------------------------------------------
+def _setup_env(workdir, rss_port, max_messages=None):
+    # 프로젝트 모듈을 import 하기 전에 설정해야 config에 반영된다
+    # max_messages: 벤치마크할 소스당 최대 메시지 수. 채널당 수집 한도가 그보다 작으면
+    # 규모를 키워도 같은 양만 읽으므로 한도를 그만큼 올린다 (메시지 하나는 최대 약 1,500자)
+    if max_messages:
+        os.environ["TELEGRAM_MAX_MESSAGES"] = str(max(max_messages, 100))
+        os.environ["TELEGRAM_MAX_CHARS"] = str(max(max_messages * 1500, 30000))
+    os.environ.setdefault("TG_API_ID", "1")
+    os.environ.setdefault("TG_API_HASH", "bench")
+    os.environ.setdefault("TG_SESSION", os.path.join(workdir, "bench"))
+    os.environ.setdefault("BOT_TOKEN", "0:bench")
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ["STORE_PATH"] = os.path.join(workdir, "store.sqlite3")
+    os.environ["METRICS_DIR"] = os.path.join(workdir, "metrics")
+    os.environ["NAVER_RSS_URL"] = f"http://127.0.0.1:{rss_port}/{{blog_id}}.xml"
+    os.environ["PRECOMPUTE_INTERVAL_MINUTES"] = "0"
+    # 가짜 Bot API라서 텔레그램 속도 제한은 풀어둔다
+    os.environ["SEND_GLOBAL_RATE"] = "100000"
+    os.environ["SEND_PRIVATE_CHAT_RATE"] = "100000"
+    os.environ["SEND_GROUP_RATE_PER_MIN"] = "6000000"
+
+
+def _reset_store(workdir, tag):
+    # 등록된 스키마는 새 파일에 연결을 열 때 다시 만들어진다
+    import message_store
+    import precompute
+
+    if message_store._conn is not None:
+        message_store._conn.close()
+    message_store._conn = None
+    message_store.STORE_PATH = os.path.join(workdir, f"store-{tag}.sqlite3")
+    precompute._ready.clear()
+
+
+def _maxrss_mb():
+    # 리눅스 ru_maxrss 단위는 KB (프로세스 전체 최대치라 규모가 커질 때만 늘어난다)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _run_once(bot_runner, metrics, fake_tg, llm, bot, use_tracemalloc):
+    fake_tg.calls.clear()
+    llm.calls = 0
+    bot.calls.clear()
+    bot.first_block_at = None
+    _http_hits.clear()
+
+    # tracemalloc은 정확한 파이썬 힙 최대치를 주지만 CPU 작업을 10배가량 느리게 만든다
+    if use_tracemalloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await bot_runner.send_morning_snapshot(bot, [-1001, -1002], compact=True, is_test=True)
+    wall = time.perf_counter() - started
+    if use_tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = peak / 1024 / 1024
+    else:
+        peak_mb = _maxrss_mb()
+
+    report = metrics.last_report or {"stages": {}, "events": []}
+    makespan = next((ev for ev in report["events"] if ev["stage"] == "summary_makespan"), {})
+    first_block = (bot.first_block_at or started + wall) - started
+    return {
+        "wall_seconds": round(wall, 3),
+        "first_block_seconds": round(first_block, 3),
+        "peak_mem_mb": round(peak_mb, 2),
+        "telegram_history_pages": fake_tg.calls["history_pages"],
+        "rss_200": _http_hits["200"],
+        "rss_304": _http_hits["304"],
+        "llm_calls": llm.calls,
+        "llm_input_tokens": report.get("llm_input_tokens", 0),
+        "bot_calls": sum(bot.calls.values()),
+        "makespan_seconds": makespan.get("seconds", 0.0),
+        "makespan_predicted": makespan.get("predicted_lpt", 0.0),
+        "stages": {k: v["count"] for k, v in report["stages"].items()},
+    }
+
+
+def _effective_messages(fake_tg, channels):
+    # 수집 한도(메시지 수/글자 수) 안에서 채널 하나가 실제로 읽는 최대 메시지 수
+    import telegram_collector
+
+    most = 0
+    for channel in channels:
+        window = [{"text": msg.text} for msg in fake_tg.channels[channel][:telegram_collector.TELEGRAM_MAX_MESSAGES]]
+        most = max(most, len(telegram_collector._apply_char_budget(window, telegram_collector.TELEGRAM_MAX_CHARS)))
+    return most
+
+
+async def _bench(args, workdir):
+    import bot_runner
+    import metrics
+    import user_client
+    import source_summarizer
+    import extractive
+    import send_queue
+    from http_pool import close_http_client
+
+    fake_tg = FakeTelegramClient()
+    llm = FakeLLM(args.llm_latency, args.llm_latency_per_1k)
+    bot = FakeBot(args.bot_latency)
+
+    user_client._client = fake_tg
+    source_summarizer.async_client = llm
+
+    # None: 환경 변수(EXTRACTIVE_COMPRESSION) 그대로, --compare-extractive: 끈 채로 한 번, 켠 채로 한 번
+    modes = [False, True] if args.compare_extractive else [None]
+
+    results = []
+    for n_sources, n_messages, extractive_on in (
+        (s, m, mode) for s in args.sources for m in args.messages for mode in modes
+    ):
+        tag = f"{n_sources}x{n_messages}"
+        if extractive_on is not None:
+            extractive.EXTRACTIVE_COMPRESSION = extractive_on
+            source_summarizer.EXTRACTIVE_COMPRESSION = extractive_on
+            tag += " +ext" if extractive_on else " -ext"
+        _reset_store(workdir, tag.replace(" ", ""))
+
+        n_tg = max(1, n_sources * 13 // 24)
+        channels = [f"bench_ch_{i}" for i in range(n_tg)]
+        blogs = {f"bench_blog_{i}": f"📝 bench {i}" for i in range(n_sources - n_tg)}
+        fake_tg.build(channels, n_messages, seed=n_sources * 7 + n_messages, skew=args.skew)
+        _feeds.build(list(blogs), min(n_messages, 50), seed=n_sources + n_messages)
+
+        bot_runner.TELEGRAM_CHANNELS = channels
+        bot_runner.NAVER_BLOGS = blogs
+        effective = _effective_messages(fake_tg, channels)
+
+        for phase in ("cold", "warm"):
+            row = await _run_once(bot_runner, metrics, fake_tg, llm, bot, args.tracemalloc)
+            row.update({
+                "sources": n_sources, "messages": n_messages, "phase": phase,
+                "messages_effective": effective,
+                "extractive": extractive.EXTRACTIVE_COMPRESSION,
+            })
+            results.append(row)
+            print(
+                f"{tag:>15} {phase:>4} | msgs/src {effective:5} | {row['wall_seconds']:8.2f}s | "
+                f"first {row['first_block_seconds']:6.2f}s | "
+                f"makespan {row['makespan_seconds']:6.2f}s (pred {row['makespan_predicted']:6.2f}s) | "
+                f"{row['peak_mem_mb']:7.1f}MB | tg pages {row['telegram_history_pages']:5} | "
+                f"rss 200/304 {row['rss_200']:4}/{row['rss_304']:<4} | "
+                f"llm {row['llm_calls']:5} | tokens in {row['llm_input_tokens']:8} | bot {row['bot_calls']:5}",
+                flush=True,
+            )
+
+    await send_queue.shutdown()
+    await close_http_client()
+    return results
+
+
+def _int_list(value):
+    return [int(x) for x in value.split(",") if x.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 스냅샷 파이프라인 벤치마크")
+    parser.add_argument("--sources", type=_int_list, default=[10, 50],
+                        help="소스 수 목록 (쉼표 구분, 예: 10,100,500)")
+    parser.add_argument("--messages", type=_int_list, default=[10, 500],
+                        help="소스당 메시지 수 목록 (쉼표 구분, 예: 10,1000,5000)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="가짜 LLM 응답 지연(초)")
+    parser.add_argument("--llm-latency-per-1k", type=float, default=0.0,
+                        help="가짜 LLM 입력 1천 토큰당 추가 지연(초)")
+    parser.add_argument("--skew", action="store_true", help="텔레그램 채널마다 메시지 수를 다르게 (1/8~1배)")
+    parser.add_argument("--compare-extractive", action="store_true",
+                        help="규모마다 추출 압축을 끈 경로와 켠 경로를 차례로 실행")
+    parser.add_argument("--bot-latency", type=float, default=0.0, help="가짜 Bot API 응답 지연(초)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="메모리를 tracemalloc으로 측정 (정확하지만 느림, 기본은 프로세스 maxrss)")
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="snapshot-bench-")
+    server = _start_rss_server()
+    _setup_env(workdir, server.server_address[1], max(args.messages))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"작업 디렉터리: {workdir}")
+    try:
+        results = asyncio.run(_bench(args, workdir))
+    finally:
+        server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,43 @@
+import time
+
+# --startup-timing 에서 봇 모듈 import 비용을 재기 위한 기준 시각
+_IMPORT_STARTED = time.perf_counter()
+
 import os
+import sys
 import asyncio
 import logging
+import importlib
 from datetime import datetime, timedelta, time as dtime
-from collections import defaultdict
 from dotenv import load_dotenv
 
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
-from telegram.error import RetryAfter
-
-from telethon import TelegramClient
-
-from telegram_collector import collect_telegram
-from source_summarizer import summarize_source
-from config import TELEGRAM_CHANNELS, CHANNEL_LABELS, NAVER_BLOGS, KST
-from naver_collector import collect_naver
+from telegram.error import BadRequest
+
+from telegram_collector import iter_telegram
+from source_summarizer import summarize_many, summarize_many_stream
+from config import (
+    TELEGRAM_CHANNELS, CHANNEL_LABELS, NAVER_BLOGS, KST,
+    SUMMARY_CONCURRENCY, SUMMARY_IN_ORDER, SUMMARY_STREAMING, DEDUP_MAX_DISTANCE, PROGRESS_EDIT_INTERVAL,
+    PRECOMPUTE_INTERVAL_MINUTES, PRECOMPUTE_START_HOUR, PIPELINE_QUEUE_SIZE,
+    SNAPSHOT_TIME_BUDGET_SECONDS, SUMMARY_TIMEOUT, SUMMARY_LPT, SNAPSHOT_RESUME_MAX_AGE_HOURS,
+)
+from naver_collector import iter_naver
+from http_pool import close_http_client
+from dedup import DuplicateIndex
+from job_scheduler import JobScheduler
+import precompute
+import poll_scheduler
+import resilience
+import snapshot_checkpoint
+import user_client
+import send_queue
+import subscribers
+import metrics
 
 load_dotenv()
 
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-API_ID = int(os.getenv("TG_API_ID"))
-API_HASH = os.getenv("TG_API_HASH")
-SESSION_NAME = os.getenv("TG_SESSION")
-
 # BOT_CHAT_ID: 숫자 ID(-100...) 또는 @채널username 모두 허용
 _CHAT_ID_RAW = os.getenv("BOT_CHAT_ID")
 if _CHAT_ID_RAW and _CHAT_ID_RAW.lstrip("-").isdigit():
@@ -30,6 +45,12 @@ if _CHAT_ID_RAW and _CHAT_ID_RAW.lstrip("-").isdigit():
 else:
     CHAT_ID = _CHAT_ID_RAW
 
+# BOT_ADMIN_IDS: 구독 관리(/subscribe, /unsubscribe, /subscribers)를 쓸 수 있는 사용자 ID, 쉼표로 구분
+# 비어 있으면 아무도 구독을 관리할 수 없다 (/chatid로 자기 ID 확인 가능)
+ADMIN_IDS = {
+    int(x) for x in os.getenv("BOT_ADMIN_IDS", "").replace(" ", "").split(",") if x.lstrip("-").isdigit()
+}
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
@@ -41,119 +62,496 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
 # -------------------------------------------------
-# 텍스트 안전 분할 + 레이트리밋 대응 (URL 중간 절단 방지)
+# 텍스트 안전 분할 + 전송 큐 (URL 중간 절단 방지)
 # -------------------------------------------------
-async def safe_send(bot, chat_id, text, limit=4000):
+async def safe_send(bot, chat_id, text, limit=4000, wait=True):
     """
     텔레그램 메시지 길이 제한 대응.
     - 가능한 한 줄바꿈(\n) 기준으로 쪼개서 URL이 중간에서 잘리는 문제를 줄임.
     - 줄바꿈이 없으면 공백 기준으로 자름.
     - 그마저도 없으면(limit보다 긴 단일 토큰) 어쩔 수 없이 limit에서 자름.
+    - 실제 전송은 send_queue가 속도 제한/재시도를 맡는다.
+    - wait=False 이면 전송 완료를 기다리지 않고 Future 목록만 돌려준다.
     """
+    futures = []
     remaining = (text or "").strip()
     while remaining:
         if len(remaining) <= limit:
-            await bot.send_message(chat_id=chat_id, text=remaining)
-            return
+            chunk = remaining
+            remaining = ""
+        else:
+            # limit 이내에서 가장 마지막 줄바꿈 우선
+            cut = remaining.rfind("\n", 0, limit)
 
-        # limit 이내에서 가장 마지막 줄바꿈 우선
-        cut = remaining.rfind("\n", 0, limit)
+            # 줄바꿈이 없다면 공백 기준으로
+            if cut < 0:
+                cut = remaining.rfind(" ", 0, limit)
 
-        # 줄바꿈이 없다면 공백 기준으로
-        if cut < 0:
-            cut = remaining.rfind(" ", 0, limit)
+            # 너무 앞에서 끊기면 비효율적이라 fallback
+            if cut < 0 or cut < int(limit * 0.6):
+                cut = limit
 
-        # 너무 앞에서 끊기면 비효율적이라 fallback
-        if cut < 0 or cut < int(limit * 0.6):
-            cut = limit
+            chunk = remaining[:cut].rstrip()
+            remaining = remaining[cut:].lstrip()
 
-        chunk = remaining[:cut].rstrip()
-        remaining = remaining[cut:].lstrip()
+        futures.append(send_queue.submit(
+            chat_id, lambda chunk=chunk: bot.send_message(chat_id=chat_id, text=chunk)
+        ))
 
-        # 레이트리밋 대응
-        while True:
-            try:
-                await bot.send_message(chat_id=chat_id, text=chunk)
-                break
-            except RetryAfter as e:
-                wait = int(getattr(e, "retry_after", 3)) + 1
-                logger.warning("RetryAfter 발생. %s초 대기 후 재시도", wait)
-                await asyncio.sleep(wait)
+    if wait:
+        await asyncio.gather(*futures)
+    return futures
+
+
+async def reply(update: Update, text):
+    return await send_queue.call(
+        update.effective_chat.id, lambda: update.message.reply_text(text)
+    )
 
 
 # -------------------------------------------------
-# (스트리밍) 채널/블로그 1개 끝날 때마다 바로 yield
+# (스트리밍) 소스 1개 요약이 끝날 때마다 바로 yield
+# - 수집 → 중복 제거 → 요약 → 전송이 소스 단위로 겹쳐서 진행된다
+#   (소스는 설정 순서대로, 앞 소스들의 수집이 모두 끝나는 즉시 요약으로 넘어간다)
+# - 요약은 SUMMARY_CONCURRENCY 개씩 동시에, 대기열은 PIPELINE_QUEUE_SIZE 개까지
+# - ordered=True 이면 설정 순서(TELEGRAM_CHANNELS → NAVER_BLOGS), False 이면 완료 순서로 yield
+# - stream=True 이면 LLM 응답을 문단 단위 조각으로 바로 yield (항상 설정 순서)
+# - 소스별 수집/요약 제한 시간, 전체 시간 예산(resilience.time_budget) 안에서 끝난 것만 보낸다
 # -------------------------------------------------
-async def generate_reports_stream(compact=False):
-    user_client = TelegramClient(SESSION_NAME, API_ID, API_HASH)
-    await user_client.start()
+def _label(kind, source):
+    if kind == "telegram":
+        return CHANNEL_LABELS.get(source, f"📡 {source}")
+    return NAVER_BLOGS.get(source, f"📝 {source}")
+
+
+async def collect_jobs(stats=None, force=False, outcomes=None, skip=()):
+    """
+    소스를 동시에 수집하면서 (key, source_name, messages) 요약 작업을 설정 순서대로 yield.
+    - 순서: TELEGRAM_CHANNELS → NAVER_BLOGS
+    - 소스 N은 그 소스와 앞의 모든 소스의 수집이 끝나는 즉시 내보낸다 (뒤 소스는 기다리지 않음)
+    - 내보낼 때 DuplicateIndex로 앞서 내보낸 소스들과 중복을 걸러낸다.
+      중복 글은 앞 소스 쪽을 남기므로 수집이 끝나는 타이밍과 관계없이 결과가 같고,
+      내보낸 작업의 메시지는 그 뒤로 바뀌지 않는다.
+    - 메시지가 없는 소스는 건너뛴다.
+    - force=True 이면 확인 주기와 관계없이 모든 소스를 새로 확인한다.
+    - outcomes에 dict를 넘기면 작업을 만들지 않은 소스의 결과를 채운다
+      (메시지 없음: None, 수집 실패: 사유). 수집은 실패했지만 저장된 메시지로 요약하는 소스는 stats["stale"]에.
+    - skip: 수집하지 않을 (kind, source) 모음 (이어서 보내는 실행에서 이미 요약이 끝난 소스)
+    """
+    if outcomes is None:
+        outcomes = {}
+
+    channels = [c for c in TELEGRAM_CHANNELS if ("telegram", c) not in skip]
+    blogs = {b: name for b, name in NAVER_BLOGS.items() if ("naver", b) not in skip}
+    keys = [("telegram", c) for c in channels] + [("naver", b) for b in blogs]
+
+    dedup = DuplicateIndex(DEDUP_MAX_DISTANCE) if DEDUP_MAX_DISTANCE > 0 else None
+    collected = asyncio.Queue()
+
+    async def collect_telegram_batches():
+        async with user_client.acquire() as client:
+            async for channel, items, error in iter_telegram(client, channels, force=force):
+                collected.put_nowait((("telegram", channel), items, error))
+
+    async def collect_naver_batches():
+        async for blog_id, items, error in iter_naver(blogs, force=force):
+            collected.put_nowait((("naver", blog_id), items, error))
+
+    async def run(collector):
+        try:
+            await collector()
+        except Exception as e:
+            collected.put_nowait((None, None, e))
+        else:
+            collected.put_nowait((None, None, None))
+
+    tasks = [
+        asyncio.create_task(run(collect_telegram_batches)),
+        asyncio.create_task(run(collect_naver_batches)),
+    ]
 
     try:
-        telegram_data = await collect_telegram(user_client, TELEGRAM_CHANNELS)
-        naver_data = await collect_naver(NAVER_BLOGS)
+        batches = {}
+        running = len(tasks)
+        for key in keys:
+            # 이 소스가 끝날 때까지 기다린다 (그동안 끝난 뒤 소스들은 모아 둔다)
+            while key not in batches and running:
+                done_key, items, error = await collected.get()
+                if done_key is None:
+                    if error is not None:
+                        raise error
+                    running -= 1
+                else:
+                    batches[done_key] = (items, error)
+
+            items, error = batches.pop(key, ([], None))
+            if items and dedup is not None:
+                items, removed = await asyncio.to_thread(dedup.add, items)
+                if stats is not None:
+                    stats["duplicates_removed"] += removed
+
+            if not items:
+                outcomes[key] = error
+                continue
+            if error and stats is not None:
+                stats["stale"].append((_label(*key), error))
+            yield key, key[1], items
     finally:
-        await user_client.disconnect()
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
 
-    telegram_grouped = defaultdict(list)
-    for item in telegram_data:
-        telegram_grouped[item["source"]].append(item)
+SECTION_HEADERS = {
+    "telegram": "━━━━━━━━━━━━━━━━━━\n📡 Telegram Channel Brief\n━━━━━━━━━━━━━━━━━━",
+    "naver": "━━━━━━━━━━━━━━━━━━\n📝 Naver Blog Brief\n━━━━━━━━━━━━━━━━━━",
+}
 
-    naver_grouped = defaultdict(list)
-    for item in naver_data:
-        naver_grouped[item["source"]].append(item)
+# 완료 순서로 보낼 때는 텔레그램/네이버 블록이 섞이므로 섹션 헤더 대신 블록마다 붙인다
+SECTION_TAGS = {
+    "telegram": "[Telegram]",
+    "naver": "[Naver Blog]",
+}
 
-    # Telegram
-    if telegram_grouped:
-        yield "━━━━━━━━━━━━━━━━━━\n📡 Telegram Channel Brief\n━━━━━━━━━━━━━━━━━━"
 
-        for source, messages in telegram_grouped.items():
-            logger.info("요약 생성 중 (Telegram): %s", source)
+async def _summarize_guarded(key, source_name, messages):
+    # 소스 하나의 요약 실패/지연이 전체 리포트를 막지 않도록 (실패하면 요약 None)
+    try:
+        return await asyncio.wait_for(
+            precompute.summarize_with_ready(key, source_name, messages),
+            resilience.stage_timeout(SUMMARY_TIMEOUT),
+        )
+    except Exception as e:
+        logger.warning("%s: 요약 실패 (%s: %s)", source_name, type(e).__name__, e)
+        return None, False
 
-            summary = summarize_source(source, messages)
 
-            label = CHANNEL_LABELS.get(source, f"📡 {source}")
-            yield f"{label}\n\n{summary}".strip()
+async def _stream_guarded(key, source_name, messages):
+    # 스트리밍 버전: 제한 시간은 조각 사이 대기마다 남은 시간으로 건다
+    events = precompute.stream_with_ready(key, source_name, messages)
+    timeout = resilience.stage_timeout(SUMMARY_TIMEOUT)
+    deadline = None if timeout is None else asyncio.get_running_loop().time() + timeout
+    try:
+        while True:
+            left = None if deadline is None else max(0.0, deadline - asyncio.get_running_loop().time())
+            try:
+                event = await asyncio.wait_for(anext(events), left)
+            except StopAsyncIteration:
+                return
+            yield event
+    except Exception as e:
+        logger.warning("%s: 요약 실패 (%s: %s)", source_name, type(e).__name__, e)
+        yield "done", None, False
+    finally:
+        await events.aclose()
 
-    # Naver
-    if naver_grouped:
-        yield "━━━━━━━━━━━━━━━━━━\n📝 Naver Blog Brief\n━━━━━━━━━━━━━━━━━━"
 
-        for blog_id, messages in naver_grouped.items():
-            logger.info("요약 생성 중 (Naver): %s", blog_id)
+async def _summarize_blocks(jobs, ordered, scheduler):
+    # 소스 하나가 블록 하나: 첫 조각이자 마지막 조각
+    async for key, summary, cached in summarize_many(
+        jobs,
+        concurrency=SUMMARY_CONCURRENCY,
+        ordered=ordered,
+        summarize_fn=_summarize_guarded,
+        max_pending=SUMMARY_CONCURRENCY + PIPELINE_QUEUE_SIZE,
+        scheduler=scheduler,
+    ):
+        yield key, summary, True, True, cached
 
-            summary = summarize_source(blog_id, messages)
 
-            label = NAVER_BLOGS.get(blog_id, f"📝 {blog_id}")
-            yield f"{label}\n\n{summary}".strip()
+async def generate_reports_stream(
+    compact=False, ordered=None, stats=None, progress=None, stream=None, force=False, checkpoint=None
+):
+    """
+    stats에 dict를 넘기면 실행 통계(sources, cache_hits, duplicates_removed, skipped, stale, makespan)를 채워준다.
+    progress(done, total, text)를 넘기면 단계가 바뀔 때마다 호출한다.
+    force=True 이면 확인 주기를 무시하고 모든 소스를 새로 확인한다.
+    resilience.time_budget 안에서 부르면 예산이 끝나는 순간 멈추고, 못 끝낸 소스는 skipped에 남는다.
+    checkpoint(snapshot_checkpoint.Checkpoint)를 넘기면 조각마다 yield 전에 저장하고(seq는 checkpoint.last_seq),
+    이미 요약이 끝난 소스와 이미 나간 섹션 헤더는 건너뛴다.
+    """
+    if ordered is None:
+        ordered = SUMMARY_IN_ORDER
+    if stream is None:
+        stream = SUMMARY_STREAMING
+
+    if progress:
+        await progress(0, 0, "📥 채널/블로그 수집 중... (수집이 끝난 소스부터 설정 순서대로 바로 분석)")
+
+    if stats is None:
+        stats = {}
+    stats["sources"] = 0
+    stats["cache_hits"] = 0
+    stats["duplicates_removed"] = 0
+    stats["skipped"] = []
+    stats["stale"] = []
+
+    # 소스별 결과: "ok" / None(메시지 없음) / 건너뛴 사유
+    outcomes = {}
+    done_before = checkpoint.summarized if checkpoint else set()
+    for key in done_before:
+        outcomes[key] = "ok"
+
+    # 메시지가 없는 소스는 빠지므로 실제 수는 끝나야 안다 (진행률은 설정된 소스 수 기준)
+    total = len(TELEGRAM_CHANNELS) + len(NAVER_BLOGS)
+
+    logger.info(
+        "파이프라인 시작: 최대 %s개 소스 (요약 동시 %s개, 대기열 %s개, %s)",
+        total, SUMMARY_CONCURRENCY, PIPELINE_QUEUE_SIZE,
+        "스트리밍" if stream else ("설정 순서" if ordered else "완료 순서"),
+    )
+
+    async def counted_jobs():
+        async for job in collect_jobs(stats, force, outcomes, skip=done_before):
+            stats["sources"] += 1
+            if checkpoint:
+                checkpoint.mark(job[0], "collected", messages=len(job[2]))
+            yield job
+
+    # 요약 시작 순서만 정한다 (비싼 것부터). 전송 순서는 아래 ordered/stream 규칙 그대로
+    scheduler = JobScheduler(SUMMARY_CONCURRENCY, lpt=SUMMARY_LPT)
+
+    jobs = counted_jobs()
+    if stream:
+        results = summarize_many_stream(
+            jobs,
+            concurrency=SUMMARY_CONCURRENCY,
+            stream_fn=_stream_guarded,
+            max_pending=SUMMARY_CONCURRENCY + PIPELINE_QUEUE_SIZE,
+            scheduler=scheduler,
+        )
+    else:
+        results = _summarize_blocks(jobs, ordered, scheduler)
+
+    done = len(done_before)
+    # 섹션 헤더는 설정 순서(텔레그램 → 네이버)로 나갈 때만 쓴다
+    sectioned = stream or ordered
+    headers_sent = set(checkpoint.headers) if checkpoint else set()
+    try:
+        while True:
+            # 전체 시간 예산이 끝나면 진행 중인 수집/요약은 취소하고 여기까지 보낸 것으로 마무리
+            try:
+                item = await asyncio.wait_for(anext(results), resilience.remaining())
+            except StopAsyncIteration:
+                break
+            except TimeoutError:
+                logger.warning("⏰ 시간 예산 초과: 완료된 %s개 소스까지만 전송", done)
+                break
+
+            (kind, source), text, first, last, cached = item
+            label = _label(kind, source)
+
+            if text is None:
+                # 요약 실패 (스트리밍 중 끊긴 경우 앞부분은 이미 나감)
+                outcomes[(kind, source)] = "요약 실패" if first else "요약 중단"
+                continue
+
+            if first:
+                if not sectioned:
+                    text = f"{SECTION_TAGS[kind]} {label}\n\n{text}"
+                else:
+                    if kind not in headers_sent:
+                        headers_sent.add(kind)
+                        if checkpoint:
+                            checkpoint.add_block((kind, None), SECTION_HEADERS[kind])
+                        yield SECTION_HEADERS[kind]
+                    text = f"{label}\n\n{text}"
+
+            text = text.strip()
+            if text:
+                if checkpoint:
+                    checkpoint.add_block((kind, source), text, last=last)
+                yield text
+            elif last and checkpoint:
+                checkpoint.mark((kind, source), "summarized")
+
+            if not last:
+                continue
+
+            outcomes[(kind, source)] = "ok"
+            if cached:
+                logger.info("요약 캐시 적중: %s", source)
+                stats["cache_hits"] += 1
+
+            done += 1
+            if progress:
+                await progress(done, total, label + (" ♻️" if cached else ""))
+    finally:
+        await results.aclose()
+
+    configured = [("telegram", c) for c in TELEGRAM_CHANNELS] + [("naver", b) for b in NAVER_BLOGS]
+    for key in configured:
+        reason = outcomes.get(key, "시간 초과")
+        if reason not in (None, "ok"):
+            stats["skipped"].append((_label(*key), reason))
+            metrics.record("source_skipped", 0.0, source=key[1], reason=reason)
+
+    makespan = scheduler.report()
+    stats["makespan"] = makespan
+    if makespan["jobs"]:
+        metrics.record(
+            "summary_makespan", makespan["actual"],
+            jobs=makespan["jobs"],
+            predicted_lpt=makespan["predicted_lpt"],
+            predicted_fifo=makespan["predicted_fifo"],
+        )
+        logger.info(
+            "요약 makespan: 예측 %.1f초 (%s, 들어온 순서였다면 %.1f초) / 실제 %.1f초, 작업 %s개",
+            makespan["predicted_lpt"], "비싼 순서" if SUMMARY_LPT else "LPT 꺼짐",
+            makespan["predicted_fifo"], makespan["actual"], makespan["jobs"],
+        )
+
+
+def skipped_note(stats):
+    """완료 메시지에 붙일 건너뛴 소스 / 이전 수집분 사용 안내 (없으면 빈 문자열)."""
+    lines = []
+    if stats.get("skipped"):
+        lines.append(
+            f"⚠️ 건너뛴 소스 {len(stats['skipped'])}개: "
+            + ", ".join(f"{label} ({reason})" for label, reason in stats["skipped"])
+        )
+    if stats.get("stale"):
+        lines.append(
+            "📦 최신 수집 실패로 이전 수집분 사용: "
+            + ", ".join(label for label, _ in stats["stale"])
+        )
+    return "\n".join(lines)
 
 
 # -------------------------------------------------
 # 자동 리포트: 스트리밍 전송 (한 소스 끝날 때마다 바로 보내기)
+# - 요약은 한 번만 만들고, 같은 블록을 모든 구독 채팅에 동시에 뿌린다
+# - 채팅별 속도 제한/재시도는 send_queue가 처리
+# - SNAPSHOT_TIME_BUDGET_SECONDS 안에 못 끝낸 소스는 건너뛰고 완료 메시지에 적는다
 # -------------------------------------------------
-async def send_morning_snapshot(bot, chat_id, compact=True, is_test=False):
-    title = "🗞️ Morning Snapshot"
-    if is_test:
-        title += " (TEST)"
-
-    await bot.send_message(
-        chat_id=chat_id,
-        text=f"{title}\n⏳ 소스별로 요약이 완성되는 즉시 순차 전송합니다."
-    )
-
-    sent_blocks = 0
-    async for report_text in generate_reports_stream(compact=compact):
-        await safe_send(bot, chat_id, report_text)
-        sent_blocks += 1
-
-    await bot.send_message(
-        chat_id=chat_id,
-        text=f"✅ 전송 완료! (총 {sent_blocks}개 블록)"
-    )
+async def send_morning_snapshot(bot, chat_ids, compact=True, is_test=False, force=False, resume=None):
+    """
+    스냅샷 한 번 실행. 조각은 보내기 전에 snapshot_checkpoint에 저장하고, 채팅별로 어디까지 나갔는지 기록한다.
+    resume에 재시작 전 실행의 Checkpoint를 넘기면 아직 안 나간 조각만 보내고,
+    요약이 끝나지 않은 소스만 이어서 수집/요약한다 (chat_ids / compact / is_test는 그 실행의 값을 따른다).
+    """
+    if resume is not None:
+        chat_ids = resume.chat_ids
+        compact = resume.compact
+        is_test = resume.kind == "test"
+    if not isinstance(chat_ids, (list, tuple)):
+        chat_ids = [chat_ids]
+
+    with metrics.run("test" if is_test else "daily") as run:
+        if resume is None:
+            checkpoint = snapshot_checkpoint.start(run.id, "test" if is_test else "daily", chat_ids, compact)
+            run_id = checkpoint.run_id
+
+            title = "🗞️ Morning Snapshot"
+            if is_test:
+                title += " (TEST)"
+            checkpoint.add_block(None, f"{title}\n⏳ 소스별로 요약이 완성되는 즉시 순차 전송합니다.")
+        else:
+            run_id = resume.run_id
+            checkpoint = resume
+            logger.info(
+                "🔁 중단된 스냅샷 %s 이어서 전송: 요약 완료 %s개 소스, 저장된 조각 %s개",
+                run_id, len(checkpoint.summarized), checkpoint.block_count(),
+            )
 
-    end_msg = "☀️ 좋은 하루 보내세요."
-    if is_test:
-        end_msg += " (TEST)"
-    await bot.send_message(chat_id=chat_id, text=end_msg)
+        try:
+            pending = {chat_id: [] for chat_id in chat_ids}
+
+            async def deliver(chat_id, seq, text):
+                futures = await safe_send(bot, chat_id, text, wait=False)
+                pending[chat_id].extend(futures)
+
+                # 조각이 전부 나가면 체크포인트에 기록 (재시작 후 이 조각은 다시 보내지 않는다)
+                def sent(f, chat_id=chat_id, seq=seq):
+                    if not f.cancelled() and f.exception() is None:
+                        checkpoint.mark_sent(chat_id, seq)
+
+                asyncio.gather(*futures).add_done_callback(sent)
+
+            # 저장돼 있지만 아직 안 나간 조각부터 (새 실행이면 제목)
+            for chat_id in chat_ids:
+                subscribers.record_delivery(run_id, chat_id, "sending")
+                for seq, text in checkpoint.unsent(chat_id):
+                    await deliver(chat_id, seq, text)
+
+            # 블록은 전송 큐에 넣기만 하고 바로 다음 요약으로 넘어간다 (전송과 요약이 동시에 진행)
+            # 시간 예산이 끝나면 그때까지 준비된 블록만 보내고 마무리
+            stats = {}
+            with resilience.time_budget(SNAPSHOT_TIME_BUDGET_SECONDS):
+                async for report_text in generate_reports_stream(
+                    compact=compact, stats=stats, force=force, checkpoint=checkpoint
+                ):
+                    for chat_id in chat_ids:
+                        await deliver(chat_id, checkpoint.last_seq, report_text)
+            sent_blocks = checkpoint.block_count()
+
+            done_msg = f"✅ 전송 완료! (총 {sent_blocks}개 블록)"
+            if resume is not None:
+                done_msg += "\n🔁 재시작으로 중단된 실행을 이어서 보냈습니다."
+            if stats.get("cache_hits"):
+                done_msg += f"\n♻️ 캐시 재사용: {stats['cache_hits']}/{stats['sources']}개 소스"
+            if stats.get("duplicates_removed"):
+                done_msg += f"\n🧹 중복 글 {stats['duplicates_removed']}개 제거"
+            note = skipped_note(stats)
+            if note:
+                done_msg += f"\n{note}"
+
+            end_msg = "☀️ 좋은 하루 보내세요."
+            if is_test:
+                end_msg += " (TEST)"
+
+            async def finish(chat_id):
+                results = await asyncio.gather(*pending[chat_id], return_exceptions=True)
+                failed = [r for r in results if isinstance(r, Exception)]
+                for e in failed:
+                    logger.error("블록 전송 실패 (chat=%s): %s: %s", chat_id, type(e).__name__, e)
+
+                msg = done_msg
+                if failed:
+                    msg += f"\n⚠️ 전송 실패 메시지: {len(failed)}개"
+
+                try:
+                    await send_queue.send(bot, chat_id, msg)
+                    await send_queue.send(bot, chat_id, end_msg)
+                except Exception as e:
+                    failed.append(e)
+
+                if not failed:
+                    status = "ok"
+                elif len(failed) < len(results):
+                    status = "partial"
+                else:
+                    status = "failed"
+
+                subscribers.record_delivery(
+                    run_id, chat_id, status,
+                    sent=len(results) - len(failed),
+                    failed=len(failed),
+                    error=f"{type(failed[-1]).__name__}: {failed[-1]}" if failed else None,
+                )
+                return chat_id, status
+
+            statuses = dict(await asyncio.gather(*[finish(chat_id) for chat_id in chat_ids]))
+        except Exception:
+            # 예외로 끝난 실행은 failed로 닫는다 (재시작 후 이어서 보내지 않음).
+            # 취소(CancelledError)는 프로세스 종료로 끊긴 것이므로 running으로 남겨 두고 재시작 후 이어서 보낸다
+            checkpoint.finish("failed")
+            raise
+
+        checkpoint.finish()
+        logger.info("스냅샷 %s 전송 결과: %s", run_id, statuses)
+        return statuses
+
+
+async def _resume_interrupted_snapshots(bot):
+    # 재시작 직전에 끝나지 못한 스냅샷이 있으면 남은 조각만 이어서 보낸다
+    if SNAPSHOT_RESUME_MAX_AGE_HOURS <= 0:
+        return
+    for checkpoint in snapshot_checkpoint.interrupted(SNAPSHOT_RESUME_MAX_AGE_HOURS):
+        try:
+            await send_morning_snapshot(bot, checkpoint.chat_ids, resume=checkpoint)
+        except Exception:
+            logger.exception("중단된 스냅샷 %s 이어서 보내기 실패", checkpoint.run_id)
 
 
 # -------------------------------------------------
@@ -161,78 +559,179 @@ async def send_morning_snapshot(bot, chat_id, compact=True, is_test=False):
 # -------------------------------------------------
 async def chatid(update: Update, context: ContextTypes.DEFAULT_TYPE):
     cid = update.effective_chat.id
-    await update.message.reply_text(
+    await reply(
+        update,
         f"🆔 이 채팅의 chat_id: {cid}\n"
-        f"→ 이 값을 Railway Variables의 BOT_CHAT_ID에 넣으면 자동 리포트가 이 채팅으로 갑니다."
+        f"→ 이 값을 Railway Variables의 BOT_CHAT_ID에 넣으면 자동 리포트가 이 채팅으로 갑니다.\n"
+        f"👤 내 사용자 ID: {update.effective_user.id if update.effective_user else '-'}\n"
+        f"→ BOT_ADMIN_IDS에 넣으면 /subscribe 등 구독 관리 명령을 쓸 수 있습니다."
     )
 
 
 # -------------------------------------------------
-# 수동 명령 (/report) - 기존 동작 유지
+# /subscribe, /unsubscribe, /subscribers : 자동 리포트 받을 채팅 관리
+# - 인자 없이 쓰면 지금 채팅, 인자로 chat_id 또는 @채널username 지정 가능
+# - BOT_ADMIN_IDS에 있는 사용자만 쓸 수 있다
 # -------------------------------------------------
-async def report(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("🔄 리포트 준비 중...")
+def admin_only(handler):
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user = update.effective_user
+        if user is None or user.id not in ADMIN_IDS:
+            logger.warning(
+                "권한 없는 구독 관리 요청: user=%s chat=%s",
+                user.id if user else None, update.effective_chat.id,
+            )
+            await reply(update, "⛔ 구독 관리 권한이 없습니다. (BOT_ADMIN_IDS에 등록된 사용자만 가능)")
+            return
+        return await handler(update, context)
 
-    user_client = TelegramClient(SESSION_NAME, API_ID, API_HASH)
-    await user_client.start()
+    return wrapper
 
-    telegram_data = await collect_telegram(user_client, TELEGRAM_CHANNELS)
-    naver_data = await collect_naver(NAVER_BLOGS)
 
-    await user_client.disconnect()
+@admin_only
+async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if context.args:
+        chat_id = subscribers.normalize_chat_id(context.args[0])
+        title = None
+    else:
+        chat_id = update.effective_chat.id
+        title = update.effective_chat.title or update.effective_chat.username
 
-    telegram_grouped = defaultdict(list)
-    for item in telegram_data:
-        telegram_grouped[item["source"]].append(item)
+    subscribers.add(chat_id, title)
+    await reply(update, f"✅ 구독 등록: {chat_id}\n매일 KST 07:00 스냅샷이 이 채팅으로 갑니다.")
 
-    naver_grouped = defaultdict(list)
-    for item in naver_data:
-        naver_grouped[item["source"]].append(item)
 
-    total_sources = len(telegram_grouped) + len(naver_grouped)
+@admin_only
+async def unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if context.args:
+        chat_id = subscribers.normalize_chat_id(context.args[0])
+    else:
+        chat_id = update.effective_chat.id
 
-    await update.message.reply_text(
-        f"📊 총 {total_sources}개 소스 분석 시작\n"
-        f"예상 소요: 약 {total_sources * 8}~{total_sources * 12}초"
-    )
+    if subscribers.remove(chat_id):
+        await reply(update, f"🗑 구독 해제: {chat_id}")
+    else:
+        await reply(update, f"ℹ️ 구독 목록에 없는 채팅입니다: {chat_id}")
+
+
+@admin_only
+async def list_subscribers(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    lines = ["📬 자동 리포트 전송 대상"]
+    if CHAT_ID:
+        lines.append(f"- {CHAT_ID} (BOT_CHAT_ID)")
+    for sub in subscribers.list_all():
+        lines.append(f"- {sub['chat_id']}" + (f" ({sub['title']})" if sub["title"] else ""))
+    if len(lines) == 1:
+        lines.append("(없음)")
+
+    run_id, deliveries = subscribers.last_deliveries()
+    if run_id:
+        lines.append(f"\n🕒 최근 전송 {run_id}")
+        for d in deliveries:
+            line = f"- {d['chat_id']}: {d['status']} (성공 {d['sent']}, 실패 {d['failed']})"
+            if d["error"]:
+                line += f" {d['error']}"
+            lines.append(line)
 
-    current = 0
+    await reply(update, "\n".join(lines))
 
-    # Telegram
-    for source, messages in telegram_grouped.items():
-        current += 1
-        await update.message.reply_text(f"📡 {current}/{total_sources} 분석 중...\n{source}")
 
-        summary = summarize_source(source, messages)
-        label = CHANNEL_LABELS.get(source, f"📡 {source}")
+# -------------------------------------------------
+# 진행 상황 메시지: 새 메시지를 계속 보내지 않고 하나를 제자리 수정
+# -------------------------------------------------
+class ProgressMessage:
+    def __init__(self, bot, chat_id, message_id, min_interval=PROGRESS_EDIT_INTERVAL):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.min_interval = min_interval
+        self.last_text = None
+        self.last_edit = 0.0
+
+    def _edit(self, text):
+        self.last_text = text
+        self.last_edit = asyncio.get_running_loop().time()
+
+        async def do_edit():
+            try:
+                await self.bot.edit_message_text(
+                    chat_id=self.chat_id, message_id=self.message_id, text=text
+                )
+            except BadRequest as e:
+                # "message is not modified" 등은 무시
+                logger.debug("진행 메시지 수정 생략: %s", e)
+
+        # 전송 큐에 넣고 기다리지 않는다 (같은 채팅의 블록 전송과 순서 유지)
+        send_queue.submit(self.chat_id, do_edit)
+
+    async def update(self, done, total, text):
+        if total:
+            text = f"⏳ {done}/{total} 완료\n{text}"
+        if text == self.last_text:
+            return
+        # 너무 자주 수정하면 레이트리밋에 걸리므로 min_interval 간격으로만 반영
+        now = asyncio.get_running_loop().time()
+        if done and done < total and now - self.last_edit < self.min_interval:
+            return
+        self._edit(text)
+
+    async def finish(self, text):
+        self._edit(text)
 
-        formatted = f"""
-━━━━━━━━━━━━━━━━━━
-{label}
-━━━━━━━━━━━━━━━━━━
 
-{summary}
-"""
-        await safe_send(context.bot, update.effective_chat.id, formatted)
+# -------------------------------------------------
+# 수동 명령 (/report)
+# - 자동 리포트와 같은 스트리밍 파이프라인 사용
+# - 진행 상황은 메시지 하나를 수정해서 표시, 블록은 완성되는 대로 전송
+# -------------------------------------------------
+def _force_refresh(context):
+    # /report full, /test_daily full : 확인 주기와 관계없이 모든 소스를 새로 확인
+    return any(arg.lower() in ("full", "전체") for arg in (context.args or []))
 
-    # Naver
-    for blog_id, messages in naver_grouped.items():
-        current += 1
-        await update.message.reply_text(f"📝 {current}/{total_sources} 분석 중...\n{blog_id}")
 
-        summary = summarize_source(blog_id, messages)
-        label = NAVER_BLOGS.get(blog_id, f"📝 {blog_id}")
+async def report(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    status_msg = await reply(update, "🔄 리포트 준비 중...")
+    progress = ProgressMessage(context.bot, chat_id, status_msg.message_id)
+
+    with metrics.run("report"):
+        pending = []
+        stats = {}
+        async for report_text in generate_reports_stream(
+            stats=stats, progress=progress.update, force=_force_refresh(context)
+        ):
+            pending.extend(await safe_send(context.bot, chat_id, report_text, wait=False))
+
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        failed = [r for r in results if isinstance(r, Exception)]
+
+        done_msg = f"✅ 모든 소스 분석 완료 ({stats.get('sources', 0)}개 소스)"
+        if stats.get("cache_hits"):
+            done_msg += f"\n♻️ 캐시 재사용: {stats['cache_hits']}개"
+        if failed:
+            done_msg += f"\n⚠️ 전송 실패 메시지: {len(failed)}개"
+        note = skipped_note(stats)
+        if note:
+            done_msg += f"\n{note}"
+        await progress.finish(done_msg)
 
-        formatted = f"""
-━━━━━━━━━━━━━━━━━━
-{label}
-━━━━━━━━━━━━━━━━━━
 
-{summary}
-"""
-        await safe_send(context.bot, update.effective_chat.id, formatted)
+# -------------------------------------------------
+# /stats : 최근 실행의 단계별 소요 시간 / 토큰 사용량
+# -------------------------------------------------
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    text = metrics.format_stats()
+
+    schedule = poll_scheduler.schedule()
+    if schedule:
+        intervals = [interval for _, _, _, interval, _ in schedule]
+        due = sum(1 for *_, left in schedule if left <= 0)
+        text += (
+            f"\n\n🗓 소스 확인 주기: {len(schedule)}개 소스, "
+            f"{min(intervals):.0f}~{max(intervals):.0f}분 간격, 지금 확인 대상 {due}개"
+        )
 
-    await update.message.reply_text("✅ 모든 소스 분석 완료")
+    await reply(update, text)
 
 
 # -------------------------------------------------
@@ -244,59 +743,119 @@ async def test_daily(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if now >= next_run:
         next_run += timedelta(days=1)
 
-    dest_chat_id = update.effective_chat.id
+    dest_chat_ids = [update.effective_chat.id]
     mode = "THIS_CHAT"
 
     if context.args and context.args[0].lower() in ("prod", "real", "chatid"):
-        if not CHAT_ID:
-            await update.message.reply_text(
-                "❌ BOT_CHAT_ID가 비어있어서 prod 테스트를 할 수 없습니다.\n"
-                "먼저 /chatid로 값 확인 후 BOT_CHAT_ID를 세팅하세요."
+        dest_chat_ids = subscribers.all_chat_ids(default=CHAT_ID)
+        if not dest_chat_ids:
+            await reply(
+                update,
+                "❌ BOT_CHAT_ID와 구독 채팅이 모두 비어있어서 prod 테스트를 할 수 없습니다.\n"
+                "먼저 /chatid로 값 확인 후 BOT_CHAT_ID를 세팅하거나 /subscribe 하세요."
             )
             return
-        dest_chat_id = CHAT_ID
-        mode = "BOT_CHAT_ID"
+        mode = "BOT_CHAT_ID + 구독자"
 
-    await update.message.reply_text(
+    await reply(
+        update,
         "🧪 자동 리포트 테스트 시작\n"
         f"- KST 현재: {now.strftime('%Y-%m-%d %H:%M:%S')}\n"
         f"- 다음 자동 실행: {next_run.strftime('%Y-%m-%d %H:%M:%S')}\n"
         f"- 전송 모드: {mode}\n"
-        f"- 전송 대상 chat_id: {dest_chat_id}\n"
+        f"- 전송 대상 chat_id: {', '.join(str(c) for c in dest_chat_ids)}\n"
         "⏳ 수집/요약 중... (완성되는 소스부터 순차 전송됩니다)"
     )
 
     try:
-        await send_morning_snapshot(
+        statuses = await send_morning_snapshot(
             bot=context.bot,
-            chat_id=dest_chat_id,
+            chat_ids=dest_chat_ids,
             compact=True,
-            is_test=True
+            is_test=True,
+            force=_force_refresh(context),
+        )
+        await reply(
+            update,
+            "✅ 테스트 전송 완료\n"
+            + "\n".join(f"- {chat_id}: {status}" for chat_id, status in statuses.items())
         )
-        await update.message.reply_text("✅ 테스트 전송 완료")
     except Exception as e:
         logger.exception("test_daily 실패")
-        await update.message.reply_text(f"❌ 테스트 실패: {type(e).__name__}: {e}")
+        await reply(update, f"❌ 테스트 실패: {type(e).__name__}: {e}")
+
+
+# 사전 계산과 오전 7시 리포트가 동시에 같은 소스를 요약하지 않도록
+_precompute_lock = asyncio.Lock()
 
 
 # -------------------------------------------------
 # 오전 7시 자동 실행 (JobQueue)
+# - 아직 끝나지 않은 사전 계산이 있으면 끝날 때까지 기다렸다가 시작한다
+#   (같은 소스를 두 번 요약하지 않고, 방금 만든 블록을 그대로 쓴다)
 # -------------------------------------------------
 async def daily_job(context: ContextTypes.DEFAULT_TYPE):
-    if not CHAT_ID:
-        logger.error("BOT_CHAT_ID가 비어있습니다. 자동 리포트를 보낼 수 없습니다.")
+    chat_ids = subscribers.all_chat_ids(default=CHAT_ID)
+    if not chat_ids:
+        logger.error("BOT_CHAT_ID와 구독 채팅이 모두 비어있습니다. 자동 리포트를 보낼 수 없습니다.")
         return
 
-    logger.info("⏰ 오전 7시 자동 리포트 실행 (JobQueue)")
-    await send_morning_snapshot(
-        bot=context.bot,
-        chat_id=CHAT_ID,
-        compact=True,
-        is_test=False
-    )
+    if _precompute_lock.locked():
+        logger.info("사전 계산이 아직 진행 중이라 끝난 뒤에 자동 리포트를 시작")
+
+    async with _precompute_lock:
+        logger.info("⏰ 오전 7시 자동 리포트 실행 (JobQueue): %s개 채팅", len(chat_ids))
+        await send_morning_snapshot(
+            bot=context.bot,
+            chat_ids=chat_ids,
+            compact=True,
+            is_test=False
+        )
+
+
+# -------------------------------------------------
+# 밤사이 사전 계산 (JobQueue, PRECOMPUTE_INTERVAL_MINUTES 마다)
+# - 새 메시지가 있는 소스만 다시 요약해서 블록을 준비해 둔다
+# - 07:00에는 바뀐 소스만 짧게 갱신하고 준비된 블록을 바로 전송
+# -------------------------------------------------
+
+async def precompute_job(context: ContextTypes.DEFAULT_TYPE):
+    now = datetime.now(KST)
+    if not (PRECOMPUTE_START_HOUR <= now.hour < 7):
+        return
+
+    if _precompute_lock.locked():
+        logger.info("이전 사전 계산이 아직 진행 중이라 이번 회차는 건너뜀")
+        return
+
+    async with _precompute_lock:
+        stats = {}
+        started = datetime.now(KST)
+        with metrics.run("precompute"):
+            async for _ in generate_reports_stream(compact=True, stats=stats, stream=False):
+                pass
+
+        elapsed = (datetime.now(KST) - started).total_seconds()
+        logger.info(
+            "🌙 사전 계산 완료: %s개 소스 중 %s개 재사용, %.1f초",
+            stats.get("sources", 0), stats.get("cache_hits", 0), elapsed,
+        )
+
+
+async def _warm_up_user_client():
+    # 폴링을 막지 않도록 백그라운드에서 미리 연결 (실패해도 첫 수집 때 다시 시도)
+    try:
+        async with user_client.acquire():
+            pass
+    except Exception as e:
+        logger.warning("Telethon 미리 연결 실패 (첫 수집 때 재시도): %s: %s", type(e).__name__, e)
 
 
 async def post_init(application):
+    # 사용자 클라이언트는 봇 수명 동안 한 번만 연결해서 계속 재사용
+    application.create_task(_warm_up_user_client())
+    application.create_task(_resume_interrupted_snapshots(application.bot))
+
     if application.job_queue is None:
         logger.error(
             "JobQueue가 활성화되어 있지 않습니다. requirements.txt에서 "
@@ -311,22 +870,116 @@ async def post_init(application):
     )
     logger.info("✅ JobQueue 등록 완료: 매일 KST 07:00 자동 리포트")
 
+    if PRECOMPUTE_INTERVAL_MINUTES > 0:
+        application.job_queue.run_repeating(
+            precompute_job,
+            interval=PRECOMPUTE_INTERVAL_MINUTES * 60,
+            first=60,
+            name="snapshot_precompute",
+        )
+        logger.info(
+            "✅ 사전 계산 등록 완료: KST %02d:00~07:00, %s분 간격",
+            PRECOMPUTE_START_HOUR, PRECOMPUTE_INTERVAL_MINUTES,
+        )
 
-def main():
+
+async def post_shutdown(application):
+    await user_client.stop()
+    await send_queue.shutdown()
+    await close_http_client()
+
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+REQUIRED_ENV = ("BOT_TOKEN", "TG_API_ID", "TG_API_HASH", "TG_SESSION", "OPENAI_API_KEY")
+
+# 첫 사용 때 불러오는 무거운 라이브러리 (--startup-timing 에서 import 비용 측정)
+LAZY_LIBRARIES = ("telethon", "openai", "feedparser", "httpx", "tiktoken")
+
+
+def load_settings():
+    """
+    필수 환경 변수를 한 번에 확인하고 사용자 클라이언트를 설정한다.
+    빠진 값이 있으면 모두 모아서 알려주고 종료. 반환: 봇 토큰
+    """
+    missing = [name for name in REQUIRED_ENV if not os.getenv(name)]
+    if missing:
+        raise SystemExit(f"필수 환경 변수가 없습니다: {', '.join(missing)}")
+
+    api_id = os.getenv("TG_API_ID")
+    if not api_id.isdigit():
+        raise SystemExit(f"TG_API_ID는 숫자여야 합니다: {api_id!r}")
+
+    user_client.configure(os.getenv("TG_SESSION"), int(api_id), os.getenv("TG_API_HASH"))
+    return os.getenv("BOT_TOKEN")
+
+
+def build_application(token):
     app = (
         ApplicationBuilder()
-        .token(BOT_TOKEN)
+        .token(token)
         .post_init(post_init)
+        .post_shutdown(post_shutdown)
         .build()
     )
 
     app.add_handler(CommandHandler("report", report))
     app.add_handler(CommandHandler("test_daily", test_daily))
     app.add_handler(CommandHandler("chatid", chatid))
+    app.add_handler(CommandHandler("subscribe", subscribe))
+    app.add_handler(CommandHandler("unsubscribe", unsubscribe))
+    app.add_handler(CommandHandler("subscribers", list_subscribers))
+    app.add_handler(CommandHandler("stats", stats_command))
+    return app
+
+
+def startup_timing():
+    """
+    python bot_runner.py --startup-timing
+    봇 모듈 import / 설정 확인 / Application 생성에 걸린 시간과,
+    첫 사용 때로 미룬 라이브러리의 import 비용을 출력하고 끝낸다 (폴링은 하지 않음).
+    """
+    rows = [("bot_runner import", _IMPORT_SECONDS)]
+
+    started = time.perf_counter()
+    token = load_settings()
+    rows.append(("설정 확인", time.perf_counter() - started))
+
+    started = time.perf_counter()
+    build_application(token)
+    rows.append(("Application 생성", time.perf_counter() - started))
+
+    ready = sum(seconds for _, seconds in rows)
+    rows.append(("= 폴링 시작 전까지", ready))
+
+    for name in LAZY_LIBRARIES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"{name}: import 실패 ({e})")
+            continue
+        rows.append((f"{name} import (첫 사용 시)", time.perf_counter() - started))
+
+    for label, seconds in rows:
+        print(f"{label:<28} {seconds * 1000:8.1f} ms")
+
+
+def main():
+    if "--startup-timing" in sys.argv:
+        startup_timing()
+        return
+
+    started = time.perf_counter()
+    app = build_application(load_settings())
+    logger.info(
+        "시작 준비 완료: import %.2f초 + 초기화 %.2f초",
+        _IMPORT_SECONDS, time.perf_counter() - started,
+    )
 
     print("🤖 봇 실행 중...")
     app.run_polling()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
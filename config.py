@@ -1,3 +1,4 @@
+import os
 from datetime import timezone, timedelta
 
 KST = timezone(timedelta(hours=9))
@@ -53,4 +54,173 @@ NAVER_BLOGS = {
     "polarisforblog": "📝 Polaristimes",
     "chunjonghyun": "📝 전종현 블로그",
     "tosoha1": "📝 농구천재",
-}
\ No newline at end of file
+}
+
+# ---------------------------
+# 로컬 저장소 (수집 메시지 / 소스별 high-water mark)
+# ---------------------------
+STORE_PATH = os.getenv("STORE_PATH", "snapshot_store.sqlite3")
+
+# 이 기간보다 오래된 메시지는 저장소에서 삭제
+STORE_RETENTION_DAYS = int(os.getenv("STORE_RETENTION_DAYS", "3"))
+
+# ---------------------------
+# Telegram 수집 설정
+# ---------------------------
+# 동시에 수집할 채널 수 (너무 크면 FloodWait 위험)
+TELEGRAM_CONCURRENCY = int(os.getenv("TELEGRAM_CONCURRENCY", "4"))
+
+# 채널당 수집 한도 (요약에 쓰이는 양 이상은 받아오지 않음)
+TELEGRAM_MAX_MESSAGES = int(os.getenv("TELEGRAM_MAX_MESSAGES", "100"))
+TELEGRAM_MAX_CHARS = int(os.getenv("TELEGRAM_MAX_CHARS", "30000"))
+
+# FloodWait 발생 시 채널당 재시도 횟수
+TELEGRAM_FLOOD_RETRIES = int(os.getenv("TELEGRAM_FLOOD_RETRIES", "2"))
+
+# ---------------------------
+# Naver 수집 설정
+# ---------------------------
+# RSS 주소 형식 ({blog_id} 자리에 블로그 id). 벤치마크에서는 로컬 서버로 바꿔 쓴다
+NAVER_RSS_URL = os.getenv("NAVER_RSS_URL", "https://rss.blog.naver.com/{blog_id}.xml")
+
+# 동시에 요청할 RSS 피드 수
+NAVER_CONCURRENCY = int(os.getenv("NAVER_CONCURRENCY", "6"))
+
+# 1이면 RSS 요약(짧은 티저) 대신 글 페이지에서 본문 전체를 받아 쓴다
+NAVER_FULL_TEXT = os.getenv("NAVER_FULL_TEXT", "0") == "1"
+
+# 본문 요청 시 호스트당 동시 요청 수 (네이버에 부담을 주지 않도록)
+NAVER_FULL_TEXT_PER_HOST = int(os.getenv("NAVER_FULL_TEXT_PER_HOST", "2"))
+
+# 글 하나당 본문 최대 글자 수
+NAVER_FULL_TEXT_MAX_CHARS = int(os.getenv("NAVER_FULL_TEXT_MAX_CHARS", "8000"))
+
+# 받아 둔 본문을 보관하는 기간(일). 같은 글은 이 기간 동안 다시 받지 않음
+NAVER_FULL_TEXT_CACHE_DAYS = int(os.getenv("NAVER_FULL_TEXT_CACHE_DAYS", "7"))
+
+# ---------------------------
+# 소스별 확인 주기 (게시 빈도에 맞춰 자동 조절)
+# ---------------------------
+# 0이면 끔 (매 실행마다 모든 소스를 확인)
+POLL_ADAPTIVE = os.getenv("POLL_ADAPTIVE", "1") == "1"
+
+# 게시 빈도를 추정할 기간(시간). 저장소 보관 기간(24시간 + STORE_RETENTION_DAYS일) 안이어야 함
+POLL_HISTORY_HOURS = int(os.getenv("POLL_HISTORY_HOURS", "72"))
+
+# 확인 간격 = 평균 게시 간격 × POLL_GAP_FRACTION, 아래 최소/최대 사이로 제한
+POLL_GAP_FRACTION = float(os.getenv("POLL_GAP_FRACTION", "0.25"))
+POLL_MIN_INTERVAL_MINUTES = int(os.getenv("POLL_MIN_INTERVAL_MINUTES", "10"))
+POLL_MAX_INTERVAL_MINUTES = int(os.getenv("POLL_MAX_INTERVAL_MINUTES", "360"))
+
+# ---------------------------
+# 소스 간 중복 제거
+# ---------------------------
+# SimHash 해밍 거리가 이 값 이하면 같은 글로 본다 (0이면 중복 제거 끔)
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))
+
+# ---------------------------
+# 요약 단계 설정
+# ---------------------------
+# 동시에 진행할 LLM 요약 요청 수
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+
+# 소스 하나당 LLM 입력(메시지 부분) 토큰 예산
+SUMMARY_INPUT_TOKEN_BUDGET = int(os.getenv("SUMMARY_INPUT_TOKEN_BUDGET", "12000"))
+
+# 입력이 이 토큰 수를 넘는 소스는 map-reduce(묶음별 병렬 요약 → 합치기)로 처리
+SUMMARY_MAP_REDUCE_THRESHOLD = int(os.getenv("SUMMARY_MAP_REDUCE_THRESHOLD", "16000"))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "8000"))
+SUMMARY_MAX_CHUNKS = int(os.getenv("SUMMARY_MAX_CHUNKS", "6"))
+
+# 입력 크기별 요약 방식 (0이면 모든 소스를 SUMMARY_MODEL로)
+# - SUMMARY_TEMPLATE_MAX_TOKENS 이하: LLM 없이 글 목록을 그대로 옮김
+# - SUMMARY_FAST_MAX_TOKENS 이하: 빠르고 저렴한 SUMMARY_FAST_MODEL
+# - 그 외: SUMMARY_MODEL
+SUMMARY_ROUTING = os.getenv("SUMMARY_ROUTING", "1") == "1"
+SUMMARY_TEMPLATE_MAX_TOKENS = int(os.getenv("SUMMARY_TEMPLATE_MAX_TOKENS", "150"))
+SUMMARY_FAST_MAX_TOKENS = int(os.getenv("SUMMARY_FAST_MAX_TOKENS", "2000"))
+SUMMARY_FAST_MODEL = os.getenv("SUMMARY_FAST_MODEL", "gpt-5-nano")
+
+# LLM 호출 전 로컬 추출 압축 (TF-IDF / TextRank로 정보량이 큰 문장만 남김, numpy 필요)
+# 입력이 EXTRACTIVE_MIN_TOKENS 이상인 소스만, 원래 토큰의 EXTRACTIVE_RATIO 만큼 남긴다
+EXTRACTIVE_COMPRESSION = os.getenv("EXTRACTIVE_COMPRESSION", "0") == "1"
+EXTRACTIVE_RATIO = float(os.getenv("EXTRACTIVE_RATIO", "0.5"))
+EXTRACTIVE_MIN_TOKENS = int(os.getenv("EXTRACTIVE_MIN_TOKENS", "3000"))
+
+# 요약 캐시: 메시지 집합이 같으면 LLM을 다시 부르지 않음
+SUMMARY_CACHE_TTL_HOURS = float(os.getenv("SUMMARY_CACHE_TTL_HOURS", "24"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "500"))
+
+# 1이면 설정 순서대로(TELEGRAM_CHANNELS → NAVER_BLOGS), 0이면 요약이 끝나는 순서대로 전송
+# (0이면 두 종류가 섞이므로 섹션 헤더 대신 블록마다 [Telegram]/[Naver Blog] 표시)
+SUMMARY_IN_ORDER = os.getenv("SUMMARY_IN_ORDER", "1") != "0"
+
+# 1이면 LLM 응답을 생성되는 대로 문단 단위로 받아 바로 전송 (스트리밍 모드는 항상 수집 순서)
+SUMMARY_STREAMING = os.getenv("SUMMARY_STREAMING", "0") == "1"
+
+# 스트리밍 전송 시 문단을 이 글자 수 이상 모아서 한 메시지로 보냄 (첫 문단은 바로 전송)
+SUMMARY_STREAM_MIN_CHARS = int(os.getenv("SUMMARY_STREAM_MIN_CHARS", "400"))
+
+# 1이면 예상 비용(토큰 수 + 지난 실행 기록)이 큰 요약부터 시작 (LPT), 0이면 들어온 순서대로
+# 전송 순서는 어느 쪽이든 그대로
+SUMMARY_LPT = os.getenv("SUMMARY_LPT", "1") == "1"
+
+# 수집이 끝나 요약을 기다리는 소스 수 상한 (수집 → 요약 사이 대기열 크기)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))
+
+# ---------------------------
+# 시간 제한 / 재시도 / 회로 차단기
+# ---------------------------
+# 자동 리포트(07:00, /test_daily) 전체 시간 예산(초). 넘으면 그때까지 준비된 블록만 보내고 마무리 (0이면 무제한)
+SNAPSHOT_TIME_BUDGET_SECONDS = int(os.getenv("SNAPSHOT_TIME_BUDGET_SECONDS", "900"))
+
+# 소스 하나당 단계별 제한 시간(초). 남은 시간 예산이 더 짧으면 그쪽을 따른다
+TELEGRAM_FETCH_TIMEOUT = float(os.getenv("TELEGRAM_FETCH_TIMEOUT", "90"))
+NAVER_FETCH_TIMEOUT = float(os.getenv("NAVER_FETCH_TIMEOUT", "45"))
+SUMMARY_TIMEOUT = float(os.getenv("SUMMARY_TIMEOUT", "240"))
+
+# RSS / LLM 일시 오류 재시도 횟수와 지수 백오프(지터 포함) 범위(초)
+RETRY_MAX_RETRIES = int(os.getenv("RETRY_MAX_RETRIES", "2"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "1"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "20"))
+
+# 수집이 연속으로 이 횟수만큼 실패한 소스는 CIRCUIT_OPEN_MINUTES 동안 요청하지 않음
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_OPEN_MINUTES = int(os.getenv("CIRCUIT_OPEN_MINUTES", "120"))
+
+# ---------------------------
+# 중단된 스냅샷 이어서 보내기 (실행 중 워커가 재시작된 경우)
+# ---------------------------
+# 재시작 후 이 시간(시간) 안에 시작된 미완료 실행만 이어서 보냄. 더 오래된 것은 버림 (0이면 이어서 보내지 않음)
+SNAPSHOT_RESUME_MAX_AGE_HOURS = float(os.getenv("SNAPSHOT_RESUME_MAX_AGE_HOURS", "3"))
+
+# ---------------------------
+# Bot API 전송 속도 제한 (텔레그램 한도: 전역 초당 30개, 채팅당 초당 1개, 그룹 분당 20개)
+# ---------------------------
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "25"))
+SEND_PRIVATE_CHAT_RATE = float(os.getenv("SEND_PRIVATE_CHAT_RATE", "1"))
+SEND_GROUP_RATE_PER_MIN = float(os.getenv("SEND_GROUP_RATE_PER_MIN", "18"))
+
+# RetryAfter / 네트워크 오류 시 메시지당 재시도 횟수
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "5"))
+
+# /report 진행 메시지 수정 최소 간격(초)
+PROGRESS_EDIT_INTERVAL = float(os.getenv("PROGRESS_EDIT_INTERVAL", "3"))
+
+# ---------------------------
+# 밤사이 사전 계산 (07:00 전송 시 바로 보낼 수 있도록)
+# ---------------------------
+# 사전 계산 주기(분). 0이면 끔
+PRECOMPUTE_INTERVAL_MINUTES = int(os.getenv("PRECOMPUTE_INTERVAL_MINUTES", "30"))
+
+# 이 시각(KST)부터 07:00 전까지 사전 계산
+PRECOMPUTE_START_HOUR = int(os.getenv("PRECOMPUTE_START_HOUR", "1"))
+
+# 이보다 오래된 사전 계산 블록은 재사용하지 않음
+PRECOMPUTE_MAX_AGE_MINUTES = int(os.getenv("PRECOMPUTE_MAX_AGE_MINUTES", "360"))
+
+# ---------------------------
+# 계측 (실행별 JSON 리포트 + Prometheus 텍스트 파일)
+# ---------------------------
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+METRICS_KEEP_RUNS = int(os.getenv("METRICS_KEEP_RUNS", "50"))
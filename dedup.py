@@ -0,0 +1,133 @@
+import re
+import hashlib
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+_URL_RE = re.compile(r"https?://\S+")
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+# 64비트 SimHash를 16비트씩 4개 밴드로 나눠 후보를 찾는다.
+# 해밍 거리 3 이하면 비둘기집 원리상 최소 한 밴드는 완전히 같다.
+_BANDS = 4
+_BAND_BITS = 64 // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def _features(text, max_chars=2000):
+    # 공백/문장부호를 없앤 뒤 글자 4-gram (한글은 띄어쓰기가 들쭉날쭉해서 단어 단위보다 안정적)
+    text = _URL_RE.sub(" ", text.lower())
+    s = "".join(w for w in _NON_WORD_RE.split(text) if w)[:max_chars]
+    if len(s) < 4:
+        return Counter([s])
+    return Counter(s[i:i + 4] for i in range(len(s) - 3))
+
+
+# 64개 비트 카운터를 큰 정수 하나에 16비트 칸(lane)으로 나란히 담아 한 번의 덧셈으로 누적한다.
+# (특징마다 64번 돌던 루프 대신 바이트 8개 테이블 조회)
+_LANE_BITS = 16
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_SPREAD = [
+    sum(((b >> k) & 1) << (_LANE_BITS * k) for k in range(8))
+    for b in range(256)
+]
+
+
+@lru_cache(maxsize=200_000)
+def _feature_spread(feature):
+    # 같은 4-gram은 글마다 반복해서 나오므로 계산 결과를 캐시
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    spread = 0
+    for j, byte in enumerate(digest):
+        spread |= _SPREAD[byte] << (8 * _LANE_BITS * j)
+    return spread
+
+
+def simhash(text):
+    acc = 0
+    total = 0
+    for feature, weight in _features(text).items():
+        acc += _feature_spread(feature) * weight
+        total += weight
+
+    # 비트 i가 켜진 특징의 가중치 합이 절반을 넘으면 1
+    out = 0
+    for i in range(64):
+        if ((acc >> (_LANE_BITS * i)) & _LANE_MASK) * 2 > total:
+            out |= 1 << i
+    return out
+
+
+def _bands(h):
+    return [(b, (h >> (b * _BAND_BITS)) & _BAND_MASK) for b in range(_BANDS)]
+
+
+class DuplicateIndex:
+    """
+    배치를 여러 번 나눠 넣어도 앞서 넣은 모든 항목과 비교하는 누적 중복 제거.
+    (소스별 배치를 설정 순서대로, 앞 소스가 모두 끝난 것부터 넣어 중복을 걸러낼 때 사용)
+    - 먼저 들어온 항목을 남기고, 같은 배치 안의 중복 항목 링크는 남긴 항목의 "dup_links"에 모은다.
+    - add()가 돌려준 항목은 그 뒤로 바꾸지 않는다 (이미 요약/전송 중일 수 있음).
+      앞 배치의 항목과 겹친 글의 링크는 이번 배치의 첫 항목 "dup_links"에 남긴다.
+    - min_chars보다 짧은 글은 비교하지 않는다 (짧은 글은 SimHash가 부정확).
+    """
+
+    def __init__(self, max_distance=3, min_chars=50):
+        self.max_distance = max_distance
+        self.min_chars = min_chars
+        self.removed = 0
+        self._batch = 0
+        self._index = defaultdict(list)  # (band, value) -> [(hash, kept item, 배치 번호)]
+
+    def _find(self, h):
+        for key in _bands(h):
+            for other_hash, other, batch in self._index[key]:
+                if bin(h ^ other_hash).count("1") <= self.max_distance:
+                    return other, batch
+        return None, None
+
+    def add(self, items):
+        """
+        반환: (남은 항목 목록, 이번 배치에서 제거된 개수)
+        """
+        self._batch += 1
+        kept = []
+        removed = 0
+        carried = []  # 앞 배치 항목과 겹친 글의 링크
+
+        for item in items:
+            text = item.get("text") or ""
+            if len(text) < self.min_chars:
+                kept.append(item)
+                continue
+
+            h = simhash(text)
+
+            match, batch = self._find(h)
+            if match is not None:
+                removed += 1
+                links = [item.get("link")] + item.get("dup_links", [])
+                if batch == self._batch:
+                    _merge_links(match, links)
+                else:
+                    carried.extend(links)
+                continue
+
+            item = dict(item)
+            kept.append(item)
+            for key in _bands(h):
+                self._index[key].append((h, item, self._batch))
+
+        if carried and kept:
+            kept[0] = dict(kept[0])
+            kept[0]["dup_links"] = list(kept[0].get("dup_links", []))
+            _merge_links(kept[0], carried)
+
+        self.removed += removed
+        return kept, removed
+
+
+def _merge_links(item, links):
+    dup_links = item.setdefault("dup_links", [])
+    for link in links:
+        if link and link != item.get("link") and link not in dup_links:
+            dup_links.append(link)
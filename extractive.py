@@ -0,0 +1,160 @@
+import re
+import time
+import zlib
+import asyncio
+import logging
+
+import metrics
+from prompt_packer import count_tokens
+from config import EXTRACTIVE_COMPRESSION, EXTRACTIVE_RATIO, EXTRACTIVE_MIN_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# LLM 호출 전 로컬 추출 압축: 소스 메시지에서 정보량이 큰 문장만 남긴다
+# - 문장을 TF-IDF 벡터로 만들고(단어/숫자 + 한글 글자 2-gram, 해시로 고정 차원) 점수를 매김
+#   문장이 많지 않으면 TextRank(문장 유사도 그래프의 PageRank), 많으면 전체 중심 벡터와의 유사도
+# - 점수 높은 문장부터 원래 입력의 EXTRACTIVE_RATIO 토큰을 넘기 직전까지 고르고, 메시지/문장 순서는 그대로 둔다
+# numpy는 처음 쓸 때 불러온다 (없으면 압축 없이 진행)
+_np = None
+_np_loaded = False
+
+_DIM = 1024
+_TEXTRANK_MAX_SENTENCES = 1500
+_DAMPING = 0.85
+_ITERATIONS = 30
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?。…])\s+|\n+")
+_TERM_RE = re.compile(r"[가-힣]+|[A-Za-z]{2,}|\d+(?:[.,]\d+)*%?")
+
+
+def _get_numpy():
+    global _np, _np_loaded
+    if not _np_loaded:
+        _np_loaded = True
+        try:
+            import numpy
+            _np = numpy
+        except Exception:
+            logger.warning("numpy를 쓸 수 없어 추출 압축을 건너뜁니다.")
+            _np = None
+    return _np
+
+
+# 단어 → 차원 번호들. 실행마다 같은 결과가 나와야 요약 캐시 키가 유지되므로 hash() 대신 crc32
+_word_buckets = {}
+
+
+def _buckets(word):
+    b = _word_buckets.get(word)
+    if b is None:
+        if "가" <= word[0] <= "힣":
+            # 형태소 분석 없이 조사/어미 차이를 흡수하도록 글자 2-gram
+            terms = [word[i:i + 2] for i in range(len(word) - 1)]
+        else:
+            terms = [word.lower()]
+        if len(_word_buckets) > 200_000:
+            _word_buckets.clear()
+        b = _word_buckets[word] = tuple(zlib.crc32(t.encode("utf-8")) % _DIM for t in terms)
+    return b
+
+
+def _tfidf(np, sentences):
+    cols, counts = [], []
+    for sentence in sentences:
+        before = len(cols)
+        for word in _TERM_RE.findall(sentence):
+            cols.extend(_buckets(word))
+        counts.append(len(cols) - before)
+
+    n = len(sentences)
+    rows = np.repeat(np.arange(n, dtype=np.int64), counts)
+    flat = rows * _DIM + np.array(cols, dtype=np.int64)
+    x = np.bincount(flat, minlength=n * _DIM).astype(np.float32).reshape(n, _DIM)
+
+    df = (x > 0).sum(axis=0)
+    idf = np.log((1 + n) / (1 + df)) + 1
+    x = np.log1p(x) * idf
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, 1e-9)
+
+
+def _scores(np, x):
+    n = x.shape[0]
+    if n > _TEXTRANK_MAX_SENTENCES:
+        centroid = x.sum(axis=0)
+        centroid /= max(float(np.linalg.norm(centroid)), 1e-9)
+        return x @ centroid
+
+    sim = x @ x.T
+    np.fill_diagonal(sim, 0.0)
+    out_weight = sim.sum(axis=1, keepdims=True)
+    transition = np.divide(sim, out_weight, out=np.zeros_like(sim), where=out_weight > 0)
+
+    rank = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(_ITERATIONS):
+        rank = (1 - _DAMPING) / n + _DAMPING * (transition.T @ rank)
+    return rank
+
+
+def compress(source_name, messages, ratio=None, min_tokens=None):
+    """
+    messages에서 정보량이 큰 문장만 남긴 새 목록을 돌려준다. 반환: (메시지 목록, 통계 dict)
+    - 입력이 min_tokens 미만이거나 numpy가 없으면 그대로
+    - 문장이 하나도 안 남은 메시지는 빠진다 (최신순 등 메시지 순서는 유지)
+    CPU 작업이라 이벤트 루프에서는 compress_async로 부른다.
+    """
+    ratio = EXTRACTIVE_RATIO if ratio is None else ratio
+    min_tokens = EXTRACTIVE_MIN_TOKENS if min_tokens is None else min_tokens
+
+    sentences = []  # (메시지 번호, 문장)
+    for idx, m in enumerate(messages):
+        for sentence in _SENTENCE_RE.split(m.get("text") or ""):
+            sentence = sentence.strip()
+            if sentence:
+                sentences.append((idx, sentence))
+
+    tokens = [count_tokens(s) for _, s in sentences]
+    total = sum(tokens)
+    stats = {"tokens_before": total, "tokens_after": total, "sentences": len(sentences), "kept": len(sentences)}
+
+    np = _get_numpy()
+    if np is None or total < min_tokens or len(sentences) < 2:
+        return messages, stats
+
+    x = _tfidf(np, [s for _, s in sentences])
+    scores = _scores(np, x)
+
+    target = int(total * ratio)
+    keep = set()
+    used = 0
+    for i in np.argsort(-scores, kind="stable"):
+        i = int(i)
+        # 자리가 남아도 점수 낮은 짧은 문장(인사말 등)으로 채우지 않는다
+        if used + tokens[i] > target and keep:
+            break
+        keep.add(i)
+        used += tokens[i]
+
+    kept_text = {}
+    for i in sorted(keep):
+        idx, sentence = sentences[i]
+        kept_text.setdefault(idx, []).append(sentence)
+    out = [{**m, "text": "\n".join(kept_text[idx])} for idx, m in enumerate(messages) if idx in kept_text]
+
+    stats.update(tokens_after=used, kept=len(keep))
+    logger.info(
+        "추출 압축 %s: %s → %s 토큰 (문장 %s/%s개, 메시지 %s/%s개)",
+        source_name, total, used, len(keep), len(sentences), len(out), len(messages),
+    )
+    return out, stats
+
+
+async def compress_async(source_name, messages):
+    """EXTRACTIVE_COMPRESSION이 켜져 있으면 스레드에서 compress를 돌린다 (꺼져 있으면 그대로)."""
+    if not EXTRACTIVE_COMPRESSION:
+        return messages
+    started = time.perf_counter()
+    out, stats = await asyncio.to_thread(compress, source_name, messages)
+    if stats["tokens_after"] < stats["tokens_before"]:
+        metrics.record("extractive", time.perf_counter() - started, source=source_name, **stats)
+    return out
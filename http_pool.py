@@ -0,0 +1,23 @@
+# 프로세스 전체에서 공유하는 HTTP 커넥션 풀
+# (매 요청마다 TCP+TLS 핸드셰이크를 새로 하지 않도록)
+_client = None
+
+
+def get_http_client():
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            follow_redirects=True,
+            headers={"User-Agent": "daily-snapshot-bot/1.0"},
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
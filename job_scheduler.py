@@ -0,0 +1,192 @@
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from contextlib import asynccontextmanager
+
+import message_store
+import precompute
+import summary_cache
+from source_summarizer import PROMPT_VERSION, route
+from config import (
+    SUMMARY_INPUT_TOKEN_BUDGET,
+    SUMMARY_MAP_REDUCE_THRESHOLD,
+    SUMMARY_CHUNK_TOKENS,
+)
+
+logger = logging.getLogger(__name__)
+
+# 소스별 요약 소요 시간 기록
+# source = "*" 행은 전체 평균 (기록이 없는 소스의 예측에 사용)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_costs (
+    source  TEXT PRIMARY KEY,
+    seconds REAL NOT NULL,
+    tokens  REAL NOT NULL,
+    runs    INTEGER NOT NULL
+);
+"""
+message_store.register_schema(_SCHEMA)
+
+# 기록이 하나도 없을 때의 예측: 고정 비용(출력 생성) + 입력 토큰 비례
+_DEFAULT_OVERHEAD = 5.0
+_DEFAULT_SECONDS_PER_TOKEN = 1 / 2000
+
+# 지수 이동 평균 가중치
+_ALPHA = 0.3
+
+
+def _effective_tokens(total):
+    # 실제로 LLM에 들어가는 양 (예산으로 잘림 / map-reduce는 묶음 하나 + 합치기)
+    if total > SUMMARY_MAP_REDUCE_THRESHOLD:
+        return 2 * SUMMARY_CHUNK_TOKENS
+    return min(total, SUMMARY_INPUT_TOKEN_BUDGET)
+
+
+def _is_free(key, source_name, messages, tier, model):
+    # LLM 없이 옮기는 작은 소스, 사전 계산 블록이나 요약 캐시가 있으면 LLM을 부르지 않는다
+    if tier == "template":
+        return True
+    if precompute.get_ready(key, messages) is not None:
+        return True
+    cache_key = summary_cache.make_key(source_name, model, PROMPT_VERSION, messages)
+    return summary_cache.get(cache_key) is not None
+
+
+def estimate_cost(key, source_name, messages):
+    """
+    요약 하나의 예상 소요 시간(초)과 유효 입력 토큰 수.
+    - 캐시/사전 계산으로 끝날 작업은 0초
+    - 지난 기록이 있으면 그 소스(없으면 전체)의 평균 시간을 토큰 수 비율로 보정 (0.5~2배)
+    """
+    tier, model, total = route(messages)
+    tokens = _effective_tokens(total)
+    if _is_free(key, source_name, messages, tier, model):
+        return 0.0, tokens
+
+    conn = message_store.get_conn()
+    row = conn.execute("SELECT seconds, tokens FROM job_costs WHERE source = ?", (source_name,)).fetchone()
+    if row is None:
+        row = conn.execute("SELECT seconds, tokens FROM job_costs WHERE source = '*'").fetchone()
+    if row is None or row["tokens"] <= 0:
+        return _DEFAULT_OVERHEAD + tokens * _DEFAULT_SECONDS_PER_TOKEN, tokens
+
+    scale = min(2.0, max(0.5, tokens / row["tokens"]))
+    return row["seconds"] * scale, tokens
+
+
+def record_cost(source_name, tokens, seconds):
+    conn = message_store.get_conn()
+    for source in (source_name, "*"):
+        row = conn.execute(
+            "SELECT seconds, tokens, runs FROM job_costs WHERE source = ?", (source,)
+        ).fetchone()
+        if row is None:
+            values = (seconds, tokens, 1)
+        else:
+            values = (
+                row["seconds"] + _ALPHA * (seconds - row["seconds"]),
+                row["tokens"] + _ALPHA * (tokens - row["tokens"]),
+                row["runs"] + 1,
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO job_costs (source, seconds, tokens, runs) VALUES (?, ?, ?, ?)",
+            (source, *values),
+        )
+    conn.commit()
+
+
+def list_schedule_makespan(costs, slots):
+    """costs 순서대로 빈 슬롯에 넣었을 때 마지막 작업이 끝나는 시각."""
+    loads = [0.0] * max(1, slots)
+    for cost in costs:
+        heapq.heapreplace(loads, loads[0] + cost)
+    return max(loads)
+
+
+class JobScheduler:
+    """
+    요약 작업 실행 순서 정하기 (동시 실행 슬롯 concurrency 개).
+    - 슬롯을 기다리는 작업 중 예상 비용이 가장 큰 것부터 시작한다 (LPT: 긴 작업이 맨 끝에 남아 전체 시간을 늘리지 않도록)
+    - 캐시로 바로 끝날 작업(비용 0)은 맨 먼저 (슬롯을 거의 안 쓰고, 앞 순서 블록 전송이 늦어지지 않도록)
+    - lpt=False 이면 들어온 순서대로
+    - 결과를 내보내는 순서는 호출 쪽(summarize_many)이 정하므로 전송 순서는 바뀌지 않는다
+    """
+
+    def __init__(self, concurrency, lpt=True):
+        self.concurrency = max(1, concurrency)
+        self.lpt = lpt
+        self._free = self.concurrency
+        self._waiters = []
+        self._seq = itertools.count()
+        self.jobs = []  # {"source", "predicted", "actual", "measured"}
+        self.started_at = None
+        self.finished_at = None
+
+    async def _acquire(self, priority):
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # 슬롯을 넘겨받은 직후 취소됐다면 다음 작업에 넘긴다
+            if fut.done() and not fut.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._free += 1
+
+    @asynccontextmanager
+    async def slot(self, key, source_name, messages):
+        """
+        슬롯 하나를 잡고 요약을 실행한다.
+        yield 하는 dict의 "measured"를 False로 두면(캐시 적중, 실패) 소요 시간을 비용 기록에 반영하지 않는다.
+        """
+        predicted, tokens = estimate_cost(key, source_name, messages)
+        if self.lpt:
+            priority = (predicted > 0, -predicted)
+        else:
+            priority = (0, 0)
+        job = {"source": source_name, "predicted": predicted, "measured": True}
+
+        await self._acquire(priority)
+        started = time.monotonic()
+        if self.started_at is None:
+            self.started_at = started
+        try:
+            yield job
+        finally:
+            self._release()
+            finished = time.monotonic()
+            self.finished_at = finished
+            job["actual"] = finished - started
+            self.jobs.append(job)
+            if job["measured"] and predicted > 0:
+                record_cost(source_name, tokens, job["actual"])
+
+    def report(self):
+        """
+        예측/실제 makespan(첫 요약 시작 ~ 마지막 요약 끝).
+        예측은 모든 작업이 처음부터 있었다고 보고 LPT / 들어온 순서(FIFO)로 배치했을 때의 값.
+        """
+        costs = [job["predicted"] for job in self.jobs]
+        actual = 0.0
+        if self.started_at is not None:
+            actual = self.finished_at - self.started_at
+        return {
+            "jobs": len(self.jobs),
+            "predicted_lpt": round(list_schedule_makespan(sorted(costs, reverse=True), self.concurrency), 2),
+            "predicted_fifo": round(list_schedule_makespan(costs, self.concurrency), 2),
+            "actual": round(actual, 2),
+        }
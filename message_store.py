@@ -0,0 +1,143 @@
+import sqlite3
+import logging
+from datetime import datetime
+
+from config import KST, STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+# 수집한 메시지를 로컬 SQLite에 쌓아두고,
+# 소스별 high-water mark(마지막으로 본 메시지 id / RSS GUID) 이후 것만 새로 받는다.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    kind    TEXT NOT NULL,
+    source  TEXT NOT NULL,
+    msg_key TEXT NOT NULL,
+    ts      REAL NOT NULL,
+    text    TEXT NOT NULL,
+    link    TEXT,
+    PRIMARY KEY (kind, source, msg_key)
+);
+CREATE INDEX IF NOT EXISTS idx_messages_window ON messages (kind, source, ts);
+
+CREATE TABLE IF NOT EXISTS source_state (
+    kind     TEXT NOT NULL,
+    source   TEXT NOT NULL,
+    mark     TEXT,
+    etag     TEXT,
+    modified TEXT,
+    PRIMARY KEY (kind, source)
+);
+"""
+
+_conn = None
+
+# 다른 모듈이 이 SQLite 파일에 함께 두는 테이블 스키마 (register_schema로 등록)
+_schemas = [_SCHEMA]
+
+
+def register_schema(schema):
+    """
+    다른 모듈의 테이블을 메시지 저장소와 같은 SQLite 파일에 둔다.
+    모듈 import 시점에 한 번 부르면, 연결을 처음 열 때(이미 열려 있으면 바로) 스키마를 만든다.
+    """
+    _schemas.append(schema)
+    if _conn is not None:
+        _conn.executescript(schema)
+
+
+def get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(STORE_PATH)
+        _conn.row_factory = sqlite3.Row
+        _conn.execute("PRAGMA journal_mode=WAL")
+        # WAL에서는 NORMAL로도 프로세스가 죽어도 커밋이 남는다 (전원 장애만 예외). 체크포인트처럼 자주 커밋하는 쓰기용
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        for schema in _schemas:
+            _conn.executescript(schema)
+    return _conn
+
+
+def get_state(kind, source):
+    row = get_conn().execute(
+        "SELECT mark, etag, modified FROM source_state WHERE kind = ? AND source = ?",
+        (kind, source),
+    ).fetchone()
+    if row is None:
+        return {"mark": None, "etag": None, "modified": None}
+    return dict(row)
+
+
+def set_state(kind, source, **fields):
+    state = get_state(kind, source)
+    state.update(fields)
+    conn = get_conn()
+    conn.execute(
+        "INSERT OR REPLACE INTO source_state (kind, source, mark, etag, modified) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (kind, source, state["mark"], state["etag"], state["modified"]),
+    )
+    conn.commit()
+
+
+def save_messages(kind, items):
+    """
+    items: {"source", "key", "date", "text", "link"} 목록.
+    이미 저장된 (kind, source, key)는 무시한다.
+    """
+    if not items:
+        return
+    conn = get_conn()
+    conn.executemany(
+        "INSERT OR IGNORE INTO messages (kind, source, msg_key, ts, text, link) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (kind, it["source"], str(it["key"]), it["date"].timestamp(), it["text"], it.get("link"))
+            for it in items
+        ],
+    )
+    conn.commit()
+
+
+def load_window(kind, source, since, limit=None):
+    """since 이후 메시지를 최신순으로 반환 (수집기 결과와 같은 dict 형태)."""
+    sql = (
+        "SELECT source, ts, text, link FROM messages "
+        "WHERE kind = ? AND source = ? AND ts >= ? ORDER BY ts DESC"
+    )
+    params = [kind, source, since.timestamp()]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    return [
+        {
+            "kind": kind,
+            "source": row["source"],
+            "date": datetime.fromtimestamp(row["ts"], KST),
+            "text": row["text"],
+            "link": row["link"],
+        }
+        for row in get_conn().execute(sql, params)
+    ]
+
+
+def post_times(kind, source, since):
+    """since 이후 저장된 메시지의 게시 시각 목록 (게시 빈도 추정용)."""
+    return [
+        datetime.fromtimestamp(row["ts"], KST)
+        for row in get_conn().execute(
+            "SELECT ts FROM messages WHERE kind = ? AND source = ? AND ts >= ?",
+            (kind, source, since.timestamp()),
+        )
+    ]
+
+
+def prune(before):
+    """before 이전 메시지는 삭제 (DB가 계속 커지지 않도록)."""
+    conn = get_conn()
+    cur = conn.execute("DELETE FROM messages WHERE ts < ?", (before.timestamp(),))
+    conn.commit()
+    if cur.rowcount:
+        logger.info("오래된 메시지 %s개 삭제", cur.rowcount)
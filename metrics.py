@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import logging
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import KST, METRICS_DIR, METRICS_KEEP_RUNS
+
+logger = logging.getLogger(__name__)
+
+# 스냅샷 실행 단계별 계측.
+# - 실행(run) 단위로 이벤트를 모아서 끝나면 JSON 리포트로 저장
+# - 프로세스 누적값은 Prometheus 텍스트 형식(metrics.prom)으로 내보냄
+_current_run = contextvars.ContextVar("metrics_run", default=None)
+
+# stage -> {"count", "sum", "max"}, (stage, field) -> 누적값
+_stage_totals = defaultdict(lambda: {"count": 0, "sum": 0.0, "max": 0.0})
+_counters = defaultdict(float)
+_last_run_seconds = {}
+
+last_report = None
+
+
+class Run:
+    def __init__(self, kind):
+        self.kind = kind
+        self.id = datetime.now(KST).strftime("%Y%m%d-%H%M%S") + f"-{kind}"
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(KST).isoformat()
+        self.events = []
+
+    def to_report(self, duration):
+        stages = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0})
+        for ev in self.events:
+            st = stages[ev["stage"]]
+            st["count"] += 1
+            st["total"] += ev["seconds"]
+            st["max"] = max(st["max"], ev["seconds"])
+
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "started_at": self.started_at,
+            "duration": round(duration, 3),
+            "stages": {k: {**v, "total": round(v["total"], 3), "max": round(v["max"], 3)}
+                       for k, v in stages.items()},
+            "llm_input_tokens": sum(ev.get("input_tokens", 0) for ev in self.events),
+            "llm_output_tokens": sum(ev.get("output_tokens", 0) for ev in self.events),
+            "send_retries": sum(ev.get("retries", 0) for ev in self.events),
+            "routing": _routing_summary(self.events),
+            "events": self.events,
+        }
+
+
+def _routing_summary(events):
+    """
+    요약 방식(route 이벤트)별 소스 수와, 모두 SUMMARY_MODEL로 요약했을 때와 비교한 절약 추정치.
+    - tokens_not_sent: template 소스라 LLM에 아예 보내지 않은 입력 토큰
+    - tokens_to_fast: SUMMARY_FAST_MODEL로 보낸 입력 토큰
+    - seconds_saved: 이번 실행 full 소스의 평균 시간 기준 (full 소스만 있거나 없으면 None)
+    """
+    tiers = {}
+    for ev in events:
+        if ev["stage"] != "route":
+            continue
+        t = tiers.setdefault(ev["tier"], {"count": 0, "seconds": 0.0, "prompt_tokens": 0})
+        t["count"] += 1
+        t["seconds"] += ev["seconds"]
+        t["prompt_tokens"] += ev.get("prompt_tokens", 0)
+    if not tiers:
+        return None
+
+    seconds_saved = None
+    full = tiers.get("full")
+    if full and len(tiers) > 1:
+        full_avg = full["seconds"] / full["count"]
+        seconds_saved = round(sum(
+            max(0.0, full_avg * t["count"] - t["seconds"])
+            for tier, t in tiers.items() if tier != "full"
+        ), 2)
+
+    return {
+        "tiers": {tier: {**t, "seconds": round(t["seconds"], 2)} for tier, t in tiers.items()},
+        "tokens_not_sent": tiers.get("template", {}).get("prompt_tokens", 0),
+        "tokens_to_fast": tiers.get("fast", {}).get("prompt_tokens", 0),
+        "seconds_saved": seconds_saved,
+    }
+
+
+def _routing_line(routing):
+    counts = ", ".join(f"{tier} {t['count']}" for tier, t in sorted(routing["tiers"].items()))
+    line = (
+        f"요약 방식 {counts} / 안 보낸 토큰 {routing['tokens_not_sent']:,}, "
+        f"빠른 모델로 보낸 토큰 {routing['tokens_to_fast']:,}"
+    )
+    if routing["seconds_saved"] is not None:
+        line += f", 절약 약 {routing['seconds_saved']:.1f}초"
+    return line
+
+
+def current_run():
+    return _current_run.get()
+
+
+def record(stage, seconds, run=None, **fields):
+    """단계 하나의 소요 시간과 부가 정보(메시지 수, 토큰 수 등)를 기록."""
+    totals = _stage_totals[stage]
+    totals["count"] += 1
+    totals["sum"] += seconds
+    totals["max"] = max(totals["max"], seconds)
+
+    for key in ("input_tokens", "output_tokens", "retries", "messages"):
+        if fields.get(key):
+            _counters[(stage, key)] += fields[key]
+
+    run = run or _current_run.get()
+    if run is not None:
+        run.events.append({"stage": stage, "seconds": round(seconds, 4), **fields})
+
+
+@contextmanager
+def timer(stage, **fields):
+    """
+    with metrics.timer("telegram_fetch", source=channel) as ev:
+        ...
+        ev["messages"] = n   # 끝나기 전에 부가 정보 추가 가능
+    """
+    started = time.perf_counter()
+    extra = dict(fields)
+    try:
+        yield extra
+    finally:
+        record(stage, time.perf_counter() - started, **extra)
+
+
+@contextmanager
+def run(kind):
+    """스냅샷 실행 하나를 감싼다. 끝나면 JSON 리포트 + Prometheus 파일을 쓴다."""
+    global last_report
+    r = Run(kind)
+    token = _current_run.set(r)
+    try:
+        yield r
+    finally:
+        _current_run.reset(token)
+        duration = time.perf_counter() - r.started
+        record("snapshot", duration, run=r, kind=kind)
+        _last_run_seconds[kind] = duration
+        last_report = r.to_report(duration)
+        _export(last_report)
+        logger.info(
+            "⏱ 실행 %s 완료: %.1f초, LLM 토큰 in=%s out=%s",
+            r.id, duration, last_report["llm_input_tokens"], last_report["llm_output_tokens"],
+        )
+        if last_report["routing"]:
+            logger.info("⏱ %s", _routing_line(last_report["routing"]))
+
+
+def prometheus_text():
+    lines = [
+        "# HELP snapshot_stage_seconds Time spent per pipeline stage.",
+        "# TYPE snapshot_stage_seconds summary",
+    ]
+    for stage, t in sorted(_stage_totals.items()):
+        lines.append(f'snapshot_stage_seconds_sum{{stage="{stage}"}} {t["sum"]:.6f}')
+        lines.append(f'snapshot_stage_seconds_count{{stage="{stage}"}} {t["count"]}')
+
+    lines.append("# HELP snapshot_stage_seconds_max Slowest single call per stage.")
+    lines.append("# TYPE snapshot_stage_seconds_max gauge")
+    for stage, t in sorted(_stage_totals.items()):
+        lines.append(f'snapshot_stage_seconds_max{{stage="{stage}"}} {t["max"]:.6f}')
+
+    lines.append("# HELP snapshot_stage_total Counters per stage (tokens, retries, messages).")
+    lines.append("# TYPE snapshot_stage_total counter")
+    for (stage, field), value in sorted(_counters.items()):
+        lines.append(f'snapshot_stage_total{{stage="{stage}",field="{field}"}} {value:g}')
+
+    lines.append("# HELP snapshot_last_run_seconds End-to-end duration of the last run.")
+    lines.append("# TYPE snapshot_last_run_seconds gauge")
+    for kind, seconds in sorted(_last_run_seconds.items()):
+        lines.append(f'snapshot_last_run_seconds{{kind="{kind}"}} {seconds:.3f}')
+
+    return "\n".join(lines) + "\n"
+
+
+def _export(report):
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        with open(os.path.join(METRICS_DIR, f"run-{report['id']}.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        with open(os.path.join(METRICS_DIR, "metrics.prom"), "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+
+        # 실행 리포트는 최근 것만 남긴다
+        reports = sorted(f for f in os.listdir(METRICS_DIR) if f.startswith("run-"))
+        for name in reports[:-METRICS_KEEP_RUNS]:
+            os.remove(os.path.join(METRICS_DIR, name))
+    except OSError as e:
+        logger.warning("메트릭 파일 저장 실패: %s", e)
+
+
+def format_stats(report=None):
+    """/stats 명령용 요약 텍스트."""
+    report = report or last_report
+    if report is None:
+        return "📈 아직 기록된 실행이 없습니다."
+
+    lines = [
+        f"📈 최근 실행 {report['id']}",
+        f"- 전체 소요: {report['duration']:.1f}초",
+        f"- LLM 토큰: 입력 {report['llm_input_tokens']:,} / 출력 {report['llm_output_tokens']:,}",
+        f"- 전송 재시도: {report['send_retries']}회",
+    ]
+    if report.get("routing"):
+        lines.append(f"- {_routing_line(report['routing'])}")
+    lines += [
+        "",
+        "단계별 (횟수 / 합계 / 최대)",
+    ]
+    for stage, st in sorted(report["stages"].items(), key=lambda kv: -kv[1]["total"]):
+        lines.append(f"- {stage}: {st['count']}회 / {st['total']:.1f}초 / {st['max']:.1f}초")
+
+    for ev in report["events"]:
+        if ev["stage"] == "summary_makespan":
+            lines.append(
+                f"- 요약 makespan: 예측 {ev['predicted_lpt']:.1f}초 "
+                f"(들어온 순서 {ev['predicted_fifo']:.1f}초) / 실제 {ev['seconds']:.1f}초"
+            )
+
+    slow = sorted(
+        (ev for ev in report["events"] if ev["stage"] == "llm"),
+        key=lambda ev: -ev["seconds"],
+    )[:3]
+    if slow:
+        lines.append("")
+        lines.append("가장 느린 LLM 호출")
+        for ev in slow:
+            lines.append(f"- {ev.get('source', '?')}: {ev['seconds']:.1f}초")
+
+    return "\n".join(lines)
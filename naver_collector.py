@@ -1,29 +1,170 @@
-import feedparser
+import asyncio
+import logging
 from datetime import datetime, timedelta
-from config import KST
 
+import message_store
+import metrics
+import poll_scheduler
+import naver_fulltext
+import resilience
+from config import KST, NAVER_CONCURRENCY, NAVER_RSS_URL, NAVER_FULL_TEXT, NAVER_FETCH_TIMEOUT
+from http_pool import get_http_client
 
-async def collect_naver(blog_dict):
-    results = []
+logger = logging.getLogger(__name__)
+
+
+async def _fetch_feed(blog_id, sem):
+    """
+    새 글이 있으면 (파싱된 entries, 새 ETag/Last-Modified), 변화가 없으면(304) ([], None), 실패하면 None.
+    ETag/Last-Modified는 저장소에 보관해서 재시작 후에도 조건부 요청을 보낸다.
+    저장은 글을 저장한 뒤 _store_new_entries가 한다 (그 전에 중단되면 다음 실행에서 304로 글을 놓치므로).
+    """
+    url = NAVER_RSS_URL.format(blog_id=blog_id)
+    state = message_store.get_state("naver", blog_id)
+
+    headers = {}
+    if state["etag"]:
+        headers["If-None-Match"] = state["etag"]
+    if state["modified"]:
+        headers["If-Modified-Since"] = state["modified"]
+
+    async def get():
+        resp = await get_http_client().get(url, headers=headers)
+        # 5xx는 일시 오류로 보고 재시도
+        if resp.status_code >= 500:
+            resp.raise_for_status()
+        return resp
+
+    async with sem:
+        with metrics.timer("rss_fetch", source=blog_id) as ev:
+            try:
+                resp = await resilience.retry(get, f"RSS {blog_id}")
+            except Exception as e:
+                logger.warning("RSS 요청 실패: %s (%s: %s)", url, type(e).__name__, e)
+                ev["status"] = type(e).__name__
+                return None
+            ev["status"] = resp.status_code
+
+    if resp.status_code == 304:
+        return [], None
+
+    if resp.status_code != 200:
+        logger.warning("RSS 응답 오류: %s (HTTP %s)", url, resp.status_code)
+        return None
+
+    # feedparser는 CPU 작업이라 이벤트 루프 밖(스레드)에서 파싱 (import도 첫 사용 때)
+    import feedparser
+    feed = await asyncio.to_thread(feedparser.parse, resp.content)
+
+    validators = {"etag": resp.headers.get("ETag"), "modified": resp.headers.get("Last-Modified")}
+    return feed.entries, validators
+
+
+def _published(entry):
+    if not hasattr(entry, "published_parsed"):
+        return None
+    return datetime(*entry.published_parsed[:6]).astimezone(KST)
+
+
+async def _store_new_entries(blog_id, entries, cutoff, validators=None):
+    # 피드는 최신 글부터 나오므로, 지난번 마지막 GUID(링크)를 만나면 그 뒤는 이미 본 글
+    last_seen = message_store.get_state("naver", blog_id)["mark"]
+
+    new_items = []
+    titles = {}
+    for entry in entries:
+        if last_seen and entry.link == last_seen:
+            break
+
+        published = _published(entry)
+        if published is None:
+            continue
+
+        if published < cutoff:
+            continue
+
+        titles[entry.link] = entry.title
+        new_items.append({
+            "source": blog_id,
+            "key": entry.link,
+            "date": published,
+            "text": f"{entry.title}\n{entry.summary}",
+            "link": entry.link
+        })
+
+    # RSS 요약은 앞부분 몇 줄뿐이라, 켜져 있으면 저장 전에 본문 전체로 바꾼다
+    if NAVER_FULL_TEXT and new_items:
+        bodies = await naver_fulltext.fetch_bodies([it["link"] for it in new_items])
+        for item in new_items:
+            body = bodies.get(item["link"])
+            if body:
+                item["text"] = f"{titles[item['link']]}\n{body}"
+
+    # 글을 저장한 다음에야 마지막 GUID와 ETag/Last-Modified를 함께 넘긴다
+    message_store.save_messages("naver", new_items)
+    state = dict(validators or {})
+    if entries:
+        state["mark"] = entries[0].link
+    if state:
+        message_store.set_state("naver", blog_id, **state)
+
+    return new_items
+
+
+async def iter_naver(blog_dict, concurrency=None, force=False):
+    """
+    블로그 피드를 동시에 받으면서, 블로그 하나가 끝날 때마다 (blog_id, 24시간 창 items, error)를 yield.
+    - 확인 주기(poll_scheduler)가 아직 안 된 블로그는 요청하지 않는다 (force=True 이면 모두 확인).
+    - 블로그당 NAVER_FETCH_TIMEOUT 안에 못 받거나 실패하면 저장소에 있는 것만 쓰고 error에 사유를 담는다.
+      연속으로 실패하는 블로그는 회로 차단기(resilience)가 한동안 건너뛴다.
+    """
     cutoff = datetime.now(KST) - timedelta(hours=24)
+    sem = asyncio.Semaphore(max(1, concurrency or NAVER_CONCURRENCY))
+
+    async def refresh(blog_id):
+        fetched = await _fetch_feed(blog_id, sem)
+        # 실패(None)한 블로그는 확인 기록을 남기지 않아 다음 실행에서 다시 시도
+        if fetched is None:
+            return "요청 실패"
 
-    for blog_id, label in blog_dict.items():
-        url = f"https://rss.blog.naver.com/{blog_id}.xml"
-        feed = feedparser.parse(url)
+        entries, validators = fetched
+        new_items = await _store_new_entries(blog_id, entries, cutoff, validators)
+        logger.info("%s: 새 글 %s개", blog_id, len(new_items))
+        # 피드에는 24시간보다 오래된 글도 있어서 게시 빈도 추정에 함께 쓴다
+        published = [p for p in map(_published, entries) if p is not None]
+        poll_scheduler.record_check("naver", blog_id, published)
+        return None
 
-        for entry in feed.entries:
-            if not hasattr(entry, "published_parsed"):
-                continue
+    async def run(blog_id):
+        error = None
+        if not poll_scheduler.is_due("naver", blog_id, force):
+            metrics.record("poll_skip", 0.0, source=blog_id)
+        elif resilience.is_open("naver", blog_id):
+            metrics.record("circuit_open", 0.0, source=blog_id)
+            error = "연속 실패로 일시 중단"
+        else:
+            try:
+                error = await asyncio.wait_for(
+                    refresh(blog_id), resilience.stage_timeout(NAVER_FETCH_TIMEOUT)
+                )
+            except Exception as e:
+                error = "시간 초과" if isinstance(e, TimeoutError) else type(e).__name__
+                logger.warning("%s: 수집 실패 (%s: %s)", blog_id, error, e)
 
-            published = datetime(*entry.published_parsed[:6]).astimezone(KST)
+            if error:
+                resilience.record_failure("naver", blog_id, error)
+            else:
+                resilience.record_success("naver", blog_id)
 
-            if published < cutoff:
-                continue
+        # 24시간 창은 저장소에서 읽는다
+        return blog_id, message_store.load_window("naver", blog_id, cutoff), error
 
-            results.append({
-                "source": blog_id,
-                "text": f"{entry.title}\n{entry.summary}",
-                "link": entry.link
-            })
+    tasks = [asyncio.create_task(run(blog_id)) for blog_id in blog_dict]
 
-    return results
\ No newline at end of file
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
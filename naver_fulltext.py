@@ -0,0 +1,195 @@
+import re
+import time
+import asyncio
+import logging
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import message_store
+import metrics
+from config import (
+    NAVER_FULL_TEXT_PER_HOST,
+    NAVER_FULL_TEXT_MAX_CHARS,
+    NAVER_FULL_TEXT_CACHE_DAYS,
+)
+from http_pool import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# 네이버 블로그 글 본문 캐시
+# 키 = RSS에 나온 글 URL. 한 번 받은 글은 보관 기간 동안 다시 요청하지 않는다.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS post_body_cache (
+    url        TEXT PRIMARY KEY,
+    body       TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+message_store.register_schema(_SCHEMA)
+
+# PC 주소는 프레임만 있는 페이지라, 본문이 바로 들어있는 모바일 페이지를 받는다
+_POST_URL_RE = re.compile(r"^https?://blog\.naver\.com/([^/?#]+)/(\d+)")
+
+# 스마트에디터 ONE/3 본문, 구 에디터 본문
+_CONTAINER_MARKERS = ("se-main-container", "postViewArea")
+
+_BLOCK_TAGS = {"p", "div", "br", "li", "h1", "h2", "h3", "h4", "tr", "blockquote"}
+_SKIP_TAGS = {"script", "style", "noscript", "button"}
+
+_host_limits = {}
+
+
+def _mobile_url(url):
+    m = _POST_URL_RE.match(url)
+    if not m:
+        return url
+    return f"https://m.blog.naver.com/{m.group(1)}/{m.group(2)}"
+
+
+def _host_limit(host):
+    sem = _host_limits.get(host)
+    if sem is None:
+        sem = _host_limits[host] = asyncio.Semaphore(max(1, NAVER_FULL_TEXT_PER_HOST))
+    return sem
+
+
+class _BodyParser(HTMLParser):
+    """본문 컨테이너 div 안의 텍스트만 모은다 (컨테이너가 닫히면 중단)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.depth = 0
+        self.skip = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if self.depth == 0:
+            if tag != "div":
+                return
+            attrs = dict(attrs)
+            marker = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+            if any(m in marker for m in _CONTAINER_MARKERS):
+                self.depth = 1
+            return
+
+        if tag == "div":
+            self.depth += 1
+        if tag in _SKIP_TAGS:
+            self.skip += 1
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if self.done or self.depth == 0:
+            return
+        if tag in _SKIP_TAGS and self.skip:
+            self.skip -= 1
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag == "div":
+            self.depth -= 1
+            if self.depth == 0:
+                self.done = True
+
+    def handle_data(self, data):
+        if self.depth and not self.skip and not self.done:
+            self.parts.append(data)
+
+
+def _container_start(html):
+    # 표시가 스크립트 등에 먼저 나올 수 있어서, <div ...> 태그 안에 있는 것만 인정
+    for marker in _CONTAINER_MARKERS:
+        pos = html.find(marker)
+        while pos >= 0:
+            start = html.rfind("<div", 0, pos)
+            if start >= 0 and ">" not in html[start:pos]:
+                return start
+            pos = html.find(marker, pos + 1)
+    return -1
+
+
+def extract_text(html):
+    """글 페이지 HTML에서 본문 텍스트만 뽑는다. 본문을 못 찾으면 빈 문자열."""
+    # 머리말/스크립트를 통째로 파싱하지 않도록 본문 컨테이너 직전부터 자른다
+    start = _container_start(html)
+    if start < 0:
+        return ""
+
+    parser = _BodyParser()
+    parser.feed(html[start:])
+    parser.close()
+
+    text = "".join(parser.parts).replace("\u200b", "").replace("\xa0", " ")
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+async def _fetch_body(url):
+    fetch_url = _mobile_url(url)
+    host = urlsplit(fetch_url).hostname or ""
+
+    async with _host_limit(host):
+        with metrics.timer("naver_body", source=host) as ev:
+            try:
+                resp = await get_http_client().get(fetch_url)
+            except Exception as e:
+                logger.warning("본문 요청 실패: %s (%s: %s)", fetch_url, type(e).__name__, e)
+                ev["status"] = type(e).__name__
+                return None
+            ev["status"] = resp.status_code
+
+    if resp.status_code != 200:
+        logger.warning("본문 응답 오류: %s (HTTP %s)", fetch_url, resp.status_code)
+        return None
+
+    # HTML 파싱은 CPU 작업이라 이벤트 루프 밖(스레드)에서
+    body = await asyncio.to_thread(extract_text, resp.text)
+    if not body:
+        logger.info("본문을 찾지 못함: %s", fetch_url)
+        return None
+    return body[:NAVER_FULL_TEXT_MAX_CHARS]
+
+
+def _prune(conn):
+    before = time.time() - NAVER_FULL_TEXT_CACHE_DAYS * 86400
+    conn.execute("DELETE FROM post_body_cache WHERE fetched_at < ?", (before,))
+
+
+async def fetch_bodies(urls):
+    """
+    글 URL들의 본문을 동시에 받아 {url: 본문}으로 반환 (실패한 글은 빠짐).
+    캐시에 있는 글은 요청하지 않고, 새로 받은 본문은 캐시에 저장한다.
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if not urls:
+        return {}
+
+    conn = message_store.get_conn()
+    placeholders = ",".join("?" * len(urls))
+    bodies = {
+        row["url"]: row["body"]
+        for row in conn.execute(
+            f"SELECT url, body FROM post_body_cache WHERE url IN ({placeholders})", urls
+        )
+    }
+
+    missing = [u for u in urls if u not in bodies]
+    if missing:
+        fetched = await asyncio.gather(*[_fetch_body(u) for u in missing])
+        now = time.time()
+        rows = [(u, body, now) for u, body in zip(missing, fetched) if body]
+        conn.executemany(
+            "INSERT OR REPLACE INTO post_body_cache (url, body, fetched_at) VALUES (?, ?, ?)", rows
+        )
+        _prune(conn)
+        conn.commit()
+        bodies.update((u, body) for u, body, _ in rows)
+
+    logger.info(
+        "본문 %s개: 캐시 %s개, 새로 받음 %s개",
+        len(urls), len(urls) - len(missing), len(bodies) - (len(urls) - len(missing)),
+    )
+    return bodies
@@ -0,0 +1,93 @@
+import time
+import logging
+from datetime import datetime, timedelta
+
+import message_store
+from config import (
+    KST,
+    POLL_ADAPTIVE,
+    POLL_HISTORY_HOURS,
+    POLL_GAP_FRACTION,
+    POLL_MIN_INTERVAL_MINUTES,
+    POLL_MAX_INTERVAL_MINUTES,
+)
+
+logger = logging.getLogger(__name__)
+
+# 소스별 확인 주기
+# 최근 게시 빈도로 다음 확인까지의 간격을 정해서, 거의 안 올라오는 소스는 드물게,
+# 자주 올라오는 소스는 자주 확인한다. 확인을 건너뛴 소스는 저장소의 24시간 창을 그대로 쓴다.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS poll_schedule (
+    kind          TEXT NOT NULL,
+    source        TEXT NOT NULL,
+    checked_at    REAL NOT NULL,
+    rate_per_hour REAL NOT NULL,
+    interval_min  REAL NOT NULL,
+    PRIMARY KEY (kind, source)
+);
+"""
+message_store.register_schema(_SCHEMA)
+
+
+def _interval_for(rate_per_hour):
+    if rate_per_hour <= 0:
+        return POLL_MAX_INTERVAL_MINUTES
+    gap_minutes = 60 / rate_per_hour
+    return min(max(gap_minutes * POLL_GAP_FRACTION, POLL_MIN_INTERVAL_MINUTES), POLL_MAX_INTERVAL_MINUTES)
+
+
+def is_due(kind, source, force=False):
+    """이번 실행에서 소스를 새로 확인해야 하는지. 기록이 없으면 항상 확인."""
+    if force or not POLL_ADAPTIVE:
+        return True
+
+    row = message_store.get_conn().execute(
+        "SELECT checked_at, interval_min FROM poll_schedule WHERE kind = ? AND source = ?",
+        (kind, source),
+    ).fetchone()
+    if row is None:
+        return True
+
+    return time.time() - row["checked_at"] >= row["interval_min"] * 60
+
+
+def record_check(kind, source, extra_times=()):
+    """
+    확인을 마친 소스의 게시 빈도를 다시 추정하고 다음 확인 간격을 저장한다.
+    - 저장소의 최근 POLL_HISTORY_HOURS 시간 게시 시각 + extra_times(RSS 피드 항목 날짜 등)를 쓴다
+    - 반환: 다음 확인까지 간격(분)
+    """
+    since = datetime.now(KST) - timedelta(hours=POLL_HISTORY_HOURS)
+    times = {
+        t.timestamp()
+        for t in list(message_store.post_times(kind, source, since)) + list(extra_times)
+        if t >= since
+    }
+    rate = len(times) / POLL_HISTORY_HOURS
+    interval = _interval_for(rate)
+
+    conn = message_store.get_conn()
+    conn.execute(
+        "INSERT OR REPLACE INTO poll_schedule "
+        "(kind, source, checked_at, rate_per_hour, interval_min) VALUES (?, ?, ?, ?, ?)",
+        (kind, source, time.time(), rate, interval),
+    )
+    conn.commit()
+
+    logger.debug("%s: 시간당 %.2f개 게시 → %s분 뒤 다시 확인", source, rate, round(interval))
+    return interval
+
+
+def schedule():
+    """현재 확인 주기 목록 (kind, source, 시간당 게시 수, 간격(분), 다음 확인까지 남은 분)."""
+    now = time.time()
+    return [
+        (
+            row["kind"], row["source"], row["rate_per_hour"], row["interval_min"],
+            max(0.0, (row["checked_at"] + row["interval_min"] * 60 - now) / 60),
+        )
+        for row in message_store.get_conn().execute(
+            "SELECT * FROM poll_schedule ORDER BY interval_min, kind, source"
+        )
+    ]
@@ -0,0 +1,70 @@
+import logging
+from datetime import datetime, timedelta
+
+from config import KST, PRECOMPUTE_MAX_AGE_MINUTES
+from source_summarizer import summarize_source_async, summarize_source_stream
+
+logger = logging.getLogger(__name__)
+
+# 밤사이 미리 만들어 둔 소스별 요약 블록
+# (kind, source) -> {"fingerprint", "summary", "at"}
+_ready = {}
+
+
+def _fingerprint(messages):
+    # 새 메시지가 들어왔는지, 다른 소스의 중복 글 링크(dup_links)가 새로 합쳐졌는지만 본다.
+    # (24시간 창에서 오래된 메시지가 빠지는 것만으로는 다시 요약하지 않음)
+    newest = max(messages, key=lambda m: m["date"])
+    dup_links = sorted({link for m in messages for link in m.get("dup_links", []) if link})
+    return newest["date"], newest.get("link"), tuple(dup_links)
+
+
+def get_ready(key, messages):
+    entry = _ready.get(key)
+    if entry is None:
+        return None
+    if datetime.now(KST) - entry["at"] > timedelta(minutes=PRECOMPUTE_MAX_AGE_MINUTES):
+        return None
+    if entry["fingerprint"] != _fingerprint(messages):
+        return None
+    return entry["summary"]
+
+
+def put_ready(key, messages, summary):
+    _ready[key] = {
+        "fingerprint": _fingerprint(messages),
+        "summary": summary,
+        "at": datetime.now(KST),
+    }
+
+
+async def summarize_with_ready(key, source_name, messages):
+    """
+    summarize_many용 요약 함수.
+    마지막 사전 계산 이후 새 메시지가 없는 소스는 준비된 블록을 그대로 쓴다.
+    반환: (요약, 재사용 여부)
+    """
+    summary = get_ready(key, messages)
+    if summary is not None:
+        return summary, True
+
+    summary, cached = await summarize_source_async(source_name, messages, with_status=True)
+    put_ready(key, messages, summary)
+    return summary, cached
+
+
+async def stream_with_ready(key, source_name, messages):
+    """
+    summarize_many_stream용 스트리밍 요약 함수.
+    준비된 블록이 있으면 한 조각으로 바로 내보내고, 없으면 생성되는 대로 흘려보낸 뒤 저장한다.
+    """
+    summary = get_ready(key, messages)
+    if summary is not None:
+        yield "chunk", summary
+        yield "done", summary, True
+        return
+
+    async for event in summarize_source_stream(source_name, messages):
+        if event[0] == "done":
+            put_ready(key, messages, event[1])
+        yield event
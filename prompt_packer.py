@@ -0,0 +1,181 @@
+import re
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+_encoder = None
+_encoder_loaded = False
+
+_QUOTE_LINE_RE = re.compile(r"^\s*(>|»)")
+_WS_RE = re.compile(r"\s+")
+
+
+def _get_encoder():
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            logger.warning("tiktoken을 쓸 수 없어 글자 수 기반으로 토큰 수를 추정합니다.")
+            _encoder = None
+    return _encoder
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+    enc = _get_encoder()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    # 대략적 추정: 영문/숫자는 4자당 1토큰, 한글 등은 1자당 약 1토큰
+    ascii_chars = sum(1 for c in text if c.isascii())
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def _truncate_to_tokens(text, max_tokens):
+    enc = _get_encoder()
+    if enc is not None:
+        return enc.decode(enc.encode(text, disallowed_special=())[:max_tokens])
+    # 추정치 기준으로 비율만큼 자름
+    ratio = max_tokens / max(count_tokens(text), 1)
+    return text[: int(len(text) * ratio)]
+
+
+def _strip_boilerplate(messages):
+    """
+    - 인용(>) 줄 제거
+    - 여러 메시지에 반복되는 줄(채널 서명, 홍보 문구 등) 제거
+    - 완전히 같은 본문은 하나만 남김
+    """
+    line_counts = Counter()
+    for m in messages:
+        for line in set((m.get("text") or "").splitlines()):
+            key = _WS_RE.sub(" ", line).strip()
+            if key:
+                line_counts[key] += 1
+
+    repeat_threshold = max(3, len(messages) // 3)
+    boilerplate = {line for line, n in line_counts.items() if n >= repeat_threshold}
+
+    cleaned = []
+    seen_bodies = set()
+    for m in messages:
+        lines = []
+        for line in (m.get("text") or "").splitlines():
+            key = _WS_RE.sub(" ", line).strip()
+            if key in boilerplate or _QUOTE_LINE_RE.match(line):
+                continue
+            lines.append(line)
+
+        text = "\n".join(lines).strip()
+        body_key = _WS_RE.sub(" ", text)
+        if not text or body_key in seen_bodies:
+            continue
+        seen_bodies.add(body_key)
+        cleaned.append({**m, "text": text})
+
+    return cleaned
+
+
+def pack_messages(source_name, messages, token_budget, per_message_overhead=12):
+    """
+    token_budget 안에 들어가도록 메시지를 고른다.
+    - messages는 최신순이라고 가정 (수집기/저장소가 그렇게 반환)
+    - 최신 글, 긴 글(분석형 콘텐츠)을 우선
+    - 반환: (고른 메시지 목록(원래 순서 유지), 통계 dict)
+    """
+    total_input = sum(count_tokens(m.get("text") or "") for m in messages)
+    cleaned = _strip_boilerplate(messages)
+
+    n = len(cleaned)
+    scored = []
+    for idx, m in enumerate(cleaned):
+        tokens = count_tokens(m["text"]) + per_message_overhead
+        recency = 1.0 - (idx / n if n else 0)
+        length = min(tokens / 400, 1.0)
+        scored.append((0.6 * recency + 0.4 * length, idx, tokens))
+
+    scored.sort(reverse=True)
+
+    chosen = {}
+    used = 0
+    for _, idx, tokens in scored:
+        if tokens <= token_budget - used:
+            chosen[idx] = cleaned[idx]
+            used += tokens
+
+    # 통째로는 안 들어간 글 중 점수가 가장 높은 것은, 남은 예산이 충분하면 앞부분만이라도 넣는다
+    remaining = token_budget - used
+    for _, idx, tokens in scored:
+        if idx in chosen:
+            continue
+        if remaining >= 200:
+            m = cleaned[idx]
+            chosen[idx] = {
+                **m,
+                "text": _truncate_to_tokens(m["text"], remaining - per_message_overhead) + " …",
+            }
+            used = token_budget
+        break
+
+    packed = [chosen[i] for i in sorted(chosen)]
+    packed_tokens = sum(count_tokens(m["text"]) for m in packed)
+
+    stats = {
+        "input_tokens": total_input,
+        "used_tokens": used,
+        "dropped_tokens": max(total_input - packed_tokens, 0),
+        "messages": len(messages),
+        "used_messages": len(packed),
+    }
+    logger.info(
+        "프롬프트 패킹 %s: %s/%s 토큰 사용, %s 토큰 제외 (메시지 %s/%s개)",
+        source_name, stats["used_tokens"], token_budget, stats["dropped_tokens"],
+        stats["used_messages"], stats["messages"],
+    )
+    return packed, stats
+
+
+def split_into_chunks(source_name, messages, chunk_tokens, max_chunks, per_message_overhead=12):
+    """
+    map-reduce 요약용. 메시지를 chunk_tokens 크기 묶음으로 나눈다.
+    - messages는 최신순이라고 가정, 최신 묶음부터 채운다
+    - max_chunks를 넘는 오래된 메시지는 버린다
+    - 한 메시지가 chunk_tokens보다 길면 앞부분만 쓴다
+    """
+    cleaned = _strip_boilerplate(messages)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    dropped = 0
+
+    for m in cleaned:
+        tokens = count_tokens(m["text"]) + per_message_overhead
+        if tokens > chunk_tokens:
+            m = {**m, "text": _truncate_to_tokens(m["text"], chunk_tokens - per_message_overhead) + " …"}
+            tokens = chunk_tokens
+
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+            if len(chunks) >= max_chunks:
+                break
+
+        current.append(m)
+        current_tokens += tokens
+    else:
+        if current:
+            chunks.append(current)
+
+    used = sum(len(c) for c in chunks)
+    dropped = len(cleaned) - used
+    logger.info(
+        "map-reduce 분할 %s: 메시지 %s개 → %s개 묶음 (오래된 메시지 %s개 제외)",
+        source_name, used, len(chunks), dropped,
+    )
+    return chunks
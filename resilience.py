@@ -0,0 +1,149 @@
+import time
+import random
+import asyncio
+import logging
+import contextvars
+from contextlib import contextmanager
+
+import message_store
+from config import (
+    RETRY_MAX_RETRIES,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_OPEN_MINUTES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------
+# 실행 전체 시간 예산
+# - time_budget 블록 안에서 만든 태스크도 같은 마감 시각을 본다 (contextvars)
+# -------------------------------------------------
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def time_budget(seconds):
+    """seconds가 0/None이면 무제한."""
+    if not seconds:
+        yield
+        return
+
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """남은 시간 예산(초). 예산이 없으면 None."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def stage_timeout(seconds):
+    """단계별 제한 시간을 남은 예산에 맞춰 줄인다 (None = 무제한)."""
+    left = remaining()
+    if left is None:
+        return seconds or None
+    if not seconds:
+        return left
+    return min(seconds, left)
+
+
+# -------------------------------------------------
+# 재시도 (지수 백오프 + 지터)
+# -------------------------------------------------
+def backoff(attempt):
+    # full jitter: 여러 소스가 같은 순간에 다시 몰려가지 않도록 0~상한 사이에서 무작위
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def retry(fn, what, retry_on=(Exception,), max_retries=None):
+    """
+    fn()을 retry_on 예외에 한해 다시 시도한다.
+    - retry_on: 예외 클래스(튜플) 또는 그것을 돌려주는 함수 (예외가 난 시점에 불러서 판단)
+    - 기다릴 시간이 남은 예산보다 길면 바로 포기한다.
+    """
+    if max_retries is None:
+        max_retries = RETRY_MAX_RETRIES
+
+    for attempt in range(max_retries + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            errors = retry_on if isinstance(retry_on, (tuple, type)) else retry_on()
+            if not isinstance(e, errors):
+                raise
+            wait = backoff(attempt)
+            left = remaining()
+            if attempt >= max_retries or (left is not None and wait >= left):
+                raise
+            logger.warning("%s 실패 (%s: %s). %.1f초 후 재시도", what, type(e).__name__, e, wait)
+            await asyncio.sleep(wait)
+
+
+# -------------------------------------------------
+# 소스별 회로 차단기
+# - 연속 CIRCUIT_FAILURE_THRESHOLD 회 실패하면 CIRCUIT_OPEN_MINUTES 동안 요청하지 않는다
+# - 시간이 지나면 한 번 시도해 보고, 성공하면 기록을 지우고 실패하면 다시 막는다
+# -------------------------------------------------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS source_health (
+    kind       TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    failures   INTEGER NOT NULL,
+    open_until REAL NOT NULL,
+    last_error TEXT,
+    PRIMARY KEY (kind, source)
+);
+"""
+message_store.register_schema(_SCHEMA)
+
+
+def is_open(kind, source):
+    """True 이면 이번에는 요청하지 않는다."""
+    row = message_store.get_conn().execute(
+        "SELECT open_until FROM source_health WHERE kind = ? AND source = ?",
+        (kind, source),
+    ).fetchone()
+    return row is not None and row["open_until"] > time.time()
+
+
+def record_success(kind, source):
+    conn = message_store.get_conn()
+    cur = conn.execute(
+        "DELETE FROM source_health WHERE kind = ? AND source = ?", (kind, source)
+    )
+    if cur.rowcount:
+        conn.commit()
+        logger.info("%s: 수집 정상화", source)
+
+
+def record_failure(kind, source, error):
+    conn = message_store.get_conn()
+    row = conn.execute(
+        "SELECT failures FROM source_health WHERE kind = ? AND source = ?",
+        (kind, source),
+    ).fetchone()
+    failures = (row["failures"] if row else 0) + 1
+
+    open_until = 0.0
+    if failures >= CIRCUIT_FAILURE_THRESHOLD:
+        open_until = time.time() + CIRCUIT_OPEN_MINUTES * 60
+        logger.warning(
+            "%s: 연속 %s회 실패 (%s) → %s분 동안 건너뜀",
+            source, failures, error, CIRCUIT_OPEN_MINUTES,
+        )
+
+    conn.execute(
+        "INSERT OR REPLACE INTO source_health (kind, source, failures, open_until, last_error) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (kind, source, failures, open_until, error),
+    )
+    conn.commit()
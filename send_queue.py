@@ -0,0 +1,151 @@
+import time
+import asyncio
+import logging
+
+from telegram.error import RetryAfter, TimedOut, NetworkError, BadRequest
+
+import metrics
+from config import (
+    SEND_GLOBAL_RATE,
+    SEND_PRIVATE_CHAT_RATE,
+    SEND_GROUP_RATE_PER_MIN,
+    SEND_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+# 봇의 모든 발신 메시지를 통과시키는 전역 전송 큐.
+# - 채팅별 큐 + 워커: 같은 채팅 안에서는 순서 보장, 채팅끼리는 동시 전송
+# - 토큰 버킷: 전역 / 채팅별로 텔레그램 한도 이하로 속도 제한
+# - RetryAfter, 네트워크 오류는 백오프 후 재시도
+_IDLE_SECONDS = 60
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = None
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self.updated is not None:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_global_bucket = TokenBucket(SEND_GLOBAL_RATE, SEND_GLOBAL_RATE)
+_chat_buckets = {}
+_queues = {}
+_workers = {}
+
+
+def _chat_bucket(chat_id):
+    bucket = _chat_buckets.get(chat_id)
+    if bucket is None:
+        # 그룹/채널(음수 id 또는 @username)은 분당 20개, 개인 채팅은 초당 1개
+        is_group = isinstance(chat_id, str) or chat_id < 0
+        if is_group:
+            bucket = TokenBucket(SEND_GROUP_RATE_PER_MIN / 60, 3)
+        else:
+            bucket = TokenBucket(SEND_PRIVATE_CHAT_RATE, 3)
+        _chat_buckets[chat_id] = bucket
+    return bucket
+
+
+async def _call_with_retry(chat_id, fn, run=None):
+    started = time.perf_counter()
+    for attempt in range(SEND_MAX_RETRIES + 1):
+        await _chat_bucket(chat_id).acquire()
+        await _global_bucket.acquire()
+        try:
+            result = await fn()
+            metrics.record(
+                "send", time.perf_counter() - started, run=run,
+                chat_id=str(chat_id), retries=attempt,
+            )
+            return result
+        except RetryAfter as e:
+            if attempt >= SEND_MAX_RETRIES:
+                raise
+            wait = int(getattr(e, "retry_after", 3)) + 1
+            logger.warning("RetryAfter 발생 (chat=%s). %s초 대기 후 재시도", chat_id, wait)
+            await asyncio.sleep(wait)
+        except BadRequest:
+            # BadRequest도 NetworkError의 하위 클래스지만 "chat not found" 같은 영구 오류라 재시도하지 않는다
+            raise
+        except (TimedOut, NetworkError) as e:
+            if attempt >= SEND_MAX_RETRIES:
+                raise
+            wait = min(2 ** attempt, 30)
+            logger.warning(
+                "전송 실패 (chat=%s, %s: %s). %s초 후 재시도", chat_id, type(e).__name__, e, wait
+            )
+            await asyncio.sleep(wait)
+
+
+async def _worker(chat_id, queue):
+    while True:
+        try:
+            fn, fut, run = await asyncio.wait_for(queue.get(), timeout=_IDLE_SECONDS)
+        except asyncio.TimeoutError:
+            if not queue.empty():
+                continue
+            # 한동안 보낼 게 없으면 워커 정리
+            _queues.pop(chat_id, None)
+            _workers.pop(chat_id, None)
+            return
+
+        if fut.cancelled():
+            continue
+
+        try:
+            result = await _call_with_retry(chat_id, fn, run)
+        except Exception as e:
+            if not fut.cancelled():
+                fut.set_exception(e)
+        else:
+            if not fut.cancelled():
+                fut.set_result(result)
+
+
+def submit(chat_id, fn):
+    """
+    fn: 인자 없이 호출하면 코루틴을 돌려주는 함수 (예: lambda: bot.send_message(...))
+    반환: 전송 결과(Message 등)를 담을 Future. 기다리지 않아도 순서대로 전송된다.
+    """
+    fut = asyncio.get_running_loop().create_future()
+
+    queue = _queues.get(chat_id)
+    if queue is None:
+        queue = asyncio.Queue()
+        _queues[chat_id] = queue
+        _workers[chat_id] = asyncio.create_task(_worker(chat_id, queue))
+
+    # 워커는 여러 실행이 공유하므로, 어떤 실행의 전송인지 넣을 때 기록해 둔다
+    queue.put_nowait((fn, fut, metrics.current_run()))
+    return fut
+
+
+async def call(chat_id, fn):
+    return await submit(chat_id, fn)
+
+
+async def send(bot, chat_id, text, **kwargs):
+    return await submit(chat_id, lambda: bot.send_message(chat_id=chat_id, text=text, **kwargs))
+
+
+async def shutdown():
+    """봇 종료 시 채팅별 워커 정리."""
+    for worker in list(_workers.values()):
+        worker.cancel()
+    _workers.clear()
+    _queues.clear()
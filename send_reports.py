@@ -1,5 +1,7 @@
 import os
+import asyncio
 from dotenv import load_dotenv
+from telethon import TelegramClient
 from telegram_collector import collect_telegram
 from source_summarizer import summarize_source
 from config import TELEGRAM_CHANNELS
@@ -26,20 +28,21 @@ def send_message(text):
         }
     )
 
+
+async def collect():
+    async with TelegramClient(session_name, api_id, api_hash) as client:
+        return await collect_telegram(client, TELEGRAM_CHANNELS)
+
+
 # 수집
-data = collect_telegram(
-    TELEGRAM_CHANNELS,
-    api_id,
-    api_hash,
-    session_name
-)
+data = asyncio.run(collect())
 
 # 채널별 그룹핑
 grouped = defaultdict(list)
 for item in data:
-    grouped[item["source"]].append(item["text"])
+    grouped[item["source"]].append(item)
 
 # 채널별 리포트 생성 및 전송
 for source, messages in grouped.items():
     report = summarize_source(source, messages)
-    send_message(report)
\ No newline at end of file
+    send_message(report)
@@ -0,0 +1,245 @@
+import json
+import time
+import logging
+
+import message_store
+
+logger = logging.getLogger(__name__)
+
+# 스냅샷 실행별 체크포인트
+# - snapshot_runs: 실행 id / 받는 채팅 / 상태(running, done, failed, abandoned)
+#   running으로 남은 실행 = 프로세스가 끝나면서 끊긴 실행 → 재시작 후 이어서 보낸다
+# - snapshot_sources: 소스별 진행 단계(collected → summarized → sent)
+# - snapshot_blocks: 내보낸 조각(제목, 섹션 헤더, 요약) 본문을 순서(seq)대로
+# - snapshot_sent: 채팅별로 어디까지 보냈는지 (seq, 조각 단위)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot_runs (
+    run_id     TEXT PRIMARY KEY,
+    kind       TEXT NOT NULL,
+    chat_ids   TEXT NOT NULL,
+    compact    INTEGER NOT NULL,
+    status     TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS snapshot_sources (
+    run_id     TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    stage      TEXT NOT NULL,
+    messages   INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, kind, source)
+);
+
+CREATE TABLE IF NOT EXISTS snapshot_blocks (
+    run_id TEXT NOT NULL,
+    seq    INTEGER NOT NULL,
+    kind   TEXT,
+    source TEXT,
+    text   TEXT NOT NULL,
+    PRIMARY KEY (run_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS snapshot_sent (
+    run_id  TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    seq     INTEGER NOT NULL,
+    PRIMARY KEY (run_id, chat_id)
+);
+"""
+message_store.register_schema(_SCHEMA)
+
+# 끝난 실행의 체크포인트 보관 기간(일)
+_KEEP_DAYS = 2
+
+
+class Checkpoint:
+    """
+    스냅샷 실행 하나의 진행 상황.
+    - add_block(): 조각을 보내기 전에 먼저 저장 (재시작 후 LLM 없이 다시 보낼 수 있도록)
+    - mark_sent(): 채팅별 전송 완료 seq 기록 → 재시작 후에는 그 다음 조각부터
+    - 요약이 끝나지 않은 소스(스트리밍 중 끊김)의 조각은 다시 보내지 않고 그 소스를 처음부터 다시 요약한다
+    """
+
+    def __init__(self, run_id, kind, chat_ids, compact):
+        self.run_id = run_id
+        self.kind = kind
+        self.chat_ids = chat_ids
+        self.compact = compact
+        self.last_seq = -1
+        self.stages = {}  # (kind, source) -> stage
+        self.last_block = {}  # (kind, source) -> 그 소스의 마지막 조각 seq
+        self.headers = set()
+        self.sent = {chat_id: -1 for chat_id in chat_ids}
+
+    @property
+    def summarized(self):
+        return {key for key, stage in self.stages.items() if stage in ("summarized", "sent")}
+
+    def block_count(self):
+        """제목을 뺀 조각 수."""
+        return max(0, self.last_seq)
+
+    def add_block(self, key, text, last=False):
+        """
+        조각 저장. key: 제목이면 None, 섹션 헤더면 (kind, None), 요약이면 (kind, source).
+        last=True 이면 그 소스를 summarized로 함께 표시한다.
+        """
+        kind, source = key or (None, None)
+        self.last_seq += 1
+        conn = message_store.get_conn()
+        conn.execute(
+            "INSERT INTO snapshot_blocks (run_id, seq, kind, source, text) VALUES (?, ?, ?, ?, ?)",
+            (self.run_id, self.last_seq, kind, source, text),
+        )
+        if source is None and kind is not None:
+            self.headers.add(kind)
+        elif source is not None:
+            self.last_block[key] = self.last_seq
+        if last:
+            self._set_stage(conn, key, "summarized")
+        self._touch(conn)
+        conn.commit()
+        return self.last_seq
+
+    def mark(self, key, stage, messages=0):
+        conn = message_store.get_conn()
+        self._set_stage(conn, key, stage, messages)
+        self._touch(conn)
+        conn.commit()
+
+    def _set_stage(self, conn, key, stage, messages=0):
+        self.stages[key] = stage
+        conn.execute(
+            "INSERT INTO snapshot_sources (run_id, kind, source, stage, messages, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (run_id, kind, source) DO UPDATE SET "
+            "stage = excluded.stage, "
+            "messages = MAX(snapshot_sources.messages, excluded.messages), "
+            "updated_at = excluded.updated_at",
+            (self.run_id, key[0], key[1], stage, messages, time.time()),
+        )
+
+    def _touch(self, conn):
+        conn.execute(
+            "UPDATE snapshot_runs SET updated_at = ? WHERE run_id = ?", (time.time(), self.run_id)
+        )
+
+    def mark_sent(self, chat_id, seq):
+        if seq <= self.sent.get(chat_id, -1):
+            return
+        self.sent[chat_id] = seq
+        conn = message_store.get_conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO snapshot_sent (run_id, chat_id, seq) VALUES (?, ?, ?)",
+            (self.run_id, str(chat_id), seq),
+        )
+
+        # 모든 채팅에 마지막 조각까지 나간 소스는 sent
+        done_upto = min(self.sent.values())
+        for key, last_seq in self.last_block.items():
+            if last_seq <= done_upto and self.stages.get(key) == "summarized":
+                self._set_stage(conn, key, "sent")
+        conn.commit()
+
+    def unsent(self, chat_id):
+        """이 채팅에 아직 안 나간 조각 [(seq, text)]. 요약이 끝나지 않은 소스의 조각은 뺀다."""
+        rows = message_store.get_conn().execute(
+            "SELECT seq, kind, source, text FROM snapshot_blocks WHERE run_id = ? AND seq > ? ORDER BY seq",
+            (self.run_id, self.sent.get(chat_id, -1)),
+        ).fetchall()
+        return [
+            (row["seq"], row["text"])
+            for row in rows
+            if row["source"] is None or (row["kind"], row["source"]) in self.summarized
+        ]
+
+    def finish(self, status="done"):
+        conn = message_store.get_conn()
+        conn.execute(
+            "UPDATE snapshot_runs SET status = ?, updated_at = ? WHERE run_id = ?",
+            (status, time.time(), self.run_id),
+        )
+        conn.commit()
+        _prune(conn)
+
+
+def start(run_id, kind, chat_ids, compact):
+    """새 실행 등록. 같은 초에 시작한 실행이 있으면 run_id 뒤에 번호를 붙인다."""
+    conn = message_store.get_conn()
+    now = time.time()
+    base, n = run_id, 1
+    while conn.execute("SELECT 1 FROM snapshot_runs WHERE run_id = ?", (run_id,)).fetchone():
+        n += 1
+        run_id = f"{base}-{n}"
+    conn.execute(
+        "INSERT INTO snapshot_runs (run_id, kind, chat_ids, compact, status, started_at, updated_at) "
+        "VALUES (?, ?, ?, ?, 'running', ?, ?)",
+        (run_id, kind, json.dumps(list(chat_ids)), int(compact), now, now),
+    )
+    conn.executemany(
+        "INSERT INTO snapshot_sent (run_id, chat_id, seq) VALUES (?, ?, -1)",
+        [(run_id, str(chat_id)) for chat_id in chat_ids],
+    )
+    conn.commit()
+    return Checkpoint(run_id, kind, list(chat_ids), compact)
+
+
+def load(run_id):
+    conn = message_store.get_conn()
+    row = conn.execute("SELECT * FROM snapshot_runs WHERE run_id = ?", (run_id,)).fetchone()
+    if row is None:
+        return None
+
+    cp = Checkpoint(run_id, row["kind"], json.loads(row["chat_ids"]), bool(row["compact"]))
+    for r in conn.execute(
+        "SELECT kind, source, stage FROM snapshot_sources WHERE run_id = ?", (run_id,)
+    ).fetchall():
+        cp.stages[(r["kind"], r["source"])] = r["stage"]
+    for r in conn.execute(
+        "SELECT seq, kind, source FROM snapshot_blocks WHERE run_id = ? ORDER BY seq", (run_id,)
+    ).fetchall():
+        cp.last_seq = r["seq"]
+        if r["source"] is None and r["kind"] is not None:
+            cp.headers.add(r["kind"])
+        elif r["source"] is not None:
+            cp.last_block[(r["kind"], r["source"])] = r["seq"]
+    sent = {
+        r["chat_id"]: r["seq"]
+        for r in conn.execute("SELECT chat_id, seq FROM snapshot_sent WHERE run_id = ?", (run_id,)).fetchall()
+    }
+    cp.sent = {chat_id: sent.get(str(chat_id), -1) for chat_id in cp.chat_ids}
+    return cp
+
+
+def interrupted(max_age_hours):
+    """
+    재시작 전에 끝나지 못한 실행 중 이어서 보낼 것 (오래된 순).
+    max_age_hours보다 오래된 미완료 실행은 abandoned로 정리한다.
+    """
+    conn = message_store.get_conn()
+    cutoff = time.time() - max_age_hours * 3600
+    conn.execute(
+        "UPDATE snapshot_runs SET status = 'abandoned' WHERE status = 'running' AND started_at < ?",
+        (cutoff,),
+    )
+    conn.commit()
+    rows = conn.execute(
+        "SELECT run_id FROM snapshot_runs WHERE status = 'running' ORDER BY started_at"
+    ).fetchall()
+    return [load(row["run_id"]) for row in rows]
+
+
+def _prune(conn):
+    cutoff = time.time() - _KEEP_DAYS * 86400
+    old = [
+        row["run_id"]
+        for row in conn.execute(
+            "SELECT run_id FROM snapshot_runs WHERE status != 'running' AND started_at < ?", (cutoff,)
+        ).fetchall()
+    ]
+    for table in ("snapshot_blocks", "snapshot_sources", "snapshot_sent", "snapshot_runs"):
+        conn.executemany(f"DELETE FROM {table} WHERE run_id = ?", [(run_id,) for run_id in old])
+    conn.commit()
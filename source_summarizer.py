@@ -1,11 +1,78 @@
-from openai import OpenAI
 import os
 import re
+import sys
+import time
+import asyncio
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
+import summary_cache
+import metrics
+import resilience
+import extractive
+from prompt_packer import pack_messages, split_into_chunks, count_tokens
+from config import (
+    SUMMARY_INPUT_TOKEN_BUDGET,
+    SUMMARY_MAP_REDUCE_THRESHOLD,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_MAX_CHUNKS,
+    SUMMARY_STREAM_MIN_CHARS,
+    SUMMARY_ROUTING,
+    SUMMARY_TEMPLATE_MAX_TOKENS,
+    SUMMARY_FAST_MAX_TOKENS,
+    SUMMARY_FAST_MODEL,
+    SUMMARY_CONCURRENCY,
+    EXTRACTIVE_COMPRESSION,
+)
+
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI 클라이언트는 첫 요약 때 만든다 (openai 패키지 import만 수백 ms라 봇 시작을 늦춤)
+client = None
+async_client = None
+
+
+def _get_client():
+    global client
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client
+
+
+def _get_async_client():
+    global async_client
+    if async_client is None:
+        from openai import AsyncOpenAI
+        # 재시도는 resilience.retry가 맡는다 (SDK 자체 재시도와 겹치지 않도록 끔)
+        async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return async_client
+
+
+# 모든 비동기 LLM 요청이 함께 쓰는 동시 실행 상한
+# (소스 단위 요약 슬롯과 별개로, map-reduce의 묶음별 요청까지 SUMMARY_CONCURRENCY 개로 묶는다)
+_llm_limit = None
+
+
+def _llm_slot():
+    global _llm_limit
+    if _llm_limit is None:
+        _llm_limit = asyncio.Semaphore(max(1, SUMMARY_CONCURRENCY))
+    return _llm_limit
+
+
+def _transient_errors():
+    # 다시 시도할 만한 오류 (연결/타임아웃, 429, 5xx)
+    # openai는 첫 호출 때 불러오므로 예외가 난 시점에 찾는다 (resilience.retry에 함수째 넘긴다)
+    openai = sys.modules.get("openai")
+    if openai is None:
+        return ()
+    return (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+SUMMARY_MODEL = "gpt-5-mini"
+
+# 프롬프트 내용을 바꾸면 올려야 함 (요약 캐시 키에 포함됨)
+PROMPT_VERSION = 2
 
 FULL_TME_LINK_RE = re.compile(r"^https://t\.me/(?:c/\d+|[A-Za-z0-9_]+)/\d+$")
 GENERIC_URL_RE = re.compile(r"^https?://\S+$")
@@ -48,16 +115,66 @@ def _strip_output_links_section(text: str) -> str:
     return "\n".join(cleaned).strip()
 
 
-def summarize_source(source_name, messages):
+# 모든 소스에 공통인 지시문. 매 호출 입력 앞부분이 동일하도록 instructions로 분리한다.
+INSTRUCTIONS = """
+이 채널이 오늘 다룬 내용을 하나의 분석 리포트 형태로 작성하라.
+
+구성:
+1. 📡 채널명
+2. 오늘 핵심 주제 3~5개 (각 주제는 짧은 소제목 + 설명)
+3. 전반적인 핵심 흐름 요약
+
+조건:
+- 800~1400자 분량
+- HTML 형식
+- 이모지 적절히 사용
+- 뉴스 나열 금지
+- 채널 내 논의 흐름 중심으로 재구성
+- 어려운 경제, 기술용어는 쉽게 풀어 설명
+- 참고한 링크도 하단에 첨부(참고 링크는 반드시 "원문 출처 링크" 섹션에 제공된 URL만 사용하라.메시지 본문에 포함된 URL은 절대 참고 링크로 포함하지 마라.새로운 URL을 생성하지 마라.)
+
+입력은 텔레그램 채널의 최근 24시간 메시지다.
+
+⚠️ 절대 HTML 태그를 사용하지 마라.
+⚠️ <html>, <body>, <ul>, <li>, <p> 등 어떤 태그도 쓰지 마라.
+⚠️ Markdown도 쓰지 마라.
+⚠️ 굵게 표시도 하지 마라.
+⚠️ 오직 순수 텍스트만 사용하라.
+대신 문단구분 및 문단과 문단사이 한줄 띄우기를 통해 글의 가독성을 높여라
+"""
+
+
+# map-reduce 요약에서 묶음 하나를 메모로 정리할 때 쓰는 지시문
+MAP_INSTRUCTIONS = """
+입력은 한 채널의 최근 24시간 메시지 중 일부다.
+나중에 다른 부분의 메모와 합쳐 하나의 리포트로 만들 예정이다.
+
+이 부분에서 다룬 핵심 주제, 논의 흐름, 중요한 수치를 빠짐없이 짧은 메모로 정리하라.
+
+조건:
+- 400~700자 분량
+- 순수 텍스트만 사용 (HTML, Markdown 금지)
+- 링크는 쓰지 마라
+"""
+
+
+def _format_messages(messages):
     combined_list = []
     links = []
 
-    for m in messages[:100]:
+    for m in messages:
         text = m.get("text") or ""
         link = m.get("link")
 
         if link:
             combined_list.append(f"{text}\n(출처: {link})")
+        else:
+            combined_list.append(text)
+
+        # 다른 소스에서 합쳐진 중복 글의 링크도 출처로 남긴다
+        for link in [link] + m.get("dup_links", []):
+            if not link:
+                continue
             link = link.strip()
 
             if link.startswith("https://t.me/"):
@@ -66,55 +183,493 @@ def summarize_source(source_name, messages):
             else:
                 if GENERIC_URL_RE.match(link):
                     links.append(link)
-        else:
-            combined_list.append(text)
 
-    combined = "\n\n".join(combined_list)
+    return "\n\n".join(combined_list), links
+
+
+def _build_prompt(source_name, messages):
+    packed, _ = pack_messages(source_name, messages, SUMMARY_INPUT_TOKEN_BUDGET)
+    combined, links = _format_messages(packed)
 
     prompt = f"""
     아래는 텔레그램 채널 '{source_name}'의 최근 24시간 메시지다.
 
-    이 채널이 오늘 다룬 내용을 하나의 분석 리포트 형태로 작성하라.
+    메시지:
+    {combined}
+    """
 
-    구성:
-    1. 📡 채널명
-    2. 오늘 핵심 주제 3~5개 (각 주제는 짧은 소제목 + 설명)
-    3. 전반적인 핵심 흐름 요약
+    return prompt, links
 
-    조건:
-    - 800~1400자 분량
-    - HTML 형식
-    - 이모지 적절히 사용
-    - 뉴스 나열 금지
-    - 채널 내 논의 흐름 중심으로 재구성
-    - 어려운 경제, 기술용어는 쉽게 풀어 설명
-    - 참고한 링크도 하단에 첨부(참고 링크는 반드시 "원문 출처 링크" 섹션에 제공된 URL만 사용하라.메시지 본문에 포함된 URL은 절대 참고 링크로 포함하지 마라.새로운 URL을 생성하지 마라.)
 
-    아래는 텔레그램 채널의 최근 24시간 메시지다.
+def route(messages):
+    """
+    입력 크기(메시지 토큰 수)로 요약 방식을 고른다. 반환: (tier, model, 토큰 수)
+    - "template": LLM 없이 글 목록을 그대로 옮김 (model None)
+    - "fast": SUMMARY_FAST_MODEL
+    - "full": SUMMARY_MODEL (SUMMARY_MAP_REDUCE_THRESHOLD를 넘으면 map-reduce)
+    """
+    tokens = sum(count_tokens(m.get("text") or "") for m in messages)
+    if not SUMMARY_ROUTING:
+        return "full", SUMMARY_MODEL, tokens
+    if tokens <= SUMMARY_TEMPLATE_MAX_TOKENS:
+        return "template", None, tokens
+    if tokens <= SUMMARY_FAST_MAX_TOKENS:
+        return "fast", SUMMARY_FAST_MODEL, tokens
+    return "full", SUMMARY_MODEL, tokens
 
-    ⚠️ 절대 HTML 태그를 사용하지 마라.
-    ⚠️ <html>, <body>, <ul>, <li>, <p> 등 어떤 태그도 쓰지 마라.
-    ⚠️ Markdown도 쓰지 마라.
-    ⚠️ 굵게 표시도 하지 마라.
-    ⚠️ 오직 순수 텍스트만 사용하라.
-    대신 문단구분 및 문단과 문단사이 한줄 띄우기를 통해 글의 가독성을 높여라
 
-    메시지:
-    {combined}
+async def _compressed(source_name, messages, tokens):
+    """캐시에 없을 때 프롬프트를 만들기 전 추출 압축 (꺼져 있으면 그대로). 반환: (메시지, 토큰 수)"""
+    compressed = await extractive.compress_async(source_name, messages)
+    if compressed is messages:
+        return messages, tokens
+    return compressed, sum(count_tokens(m.get("text") or "") for m in compressed)
+
+
+def _render_template(source_name, messages):
+    # 글이 몇 개 안 되는 소스: 요약 대신 글마다 첫 줄만 옮기고 링크 섹션을 붙인다
+    _, links = _format_messages(messages)
+    lines = []
+    for m in messages:
+        for line in (m.get("text") or "").splitlines():
+            line = line.strip()
+            if line and not GENERIC_URL_RE.match(line):
+                lines.append(f"• {line[:200]}")
+                break
+    body = f"🗒 새 글 {len(messages)}개 (내용이 짧아 요약 없이 옮김)\n\n" + "\n".join(lines)
+    return _finalize(body, links)
+
+
+_instruction_tokens = None
+
+
+def _record_route(source_name, tier, model, tokens, started):
+    """
+    소스 하나의 요약 방식과 걸린 시간을 metrics에 남긴다 (캐시 적중은 제외).
+    prompt_tokens는 지시문을 포함해 LLM에 들어갔을(template이면 들어갈 뻔한) 입력 토큰 추정치.
+    """
+    global _instruction_tokens
+    if _instruction_tokens is None:
+        _instruction_tokens = count_tokens(INSTRUCTIONS)
+    metrics.record(
+        "route", time.perf_counter() - started,
+        source=source_name, tier=tier, model=model,
+        prompt_tokens=_instruction_tokens + min(tokens, SUMMARY_INPUT_TOKEN_BUDGET),
+    )
+
+
+async def _map_reduce_prompt(source_name, messages):
     """
+    map-reduce의 map 단계.
+    묶음별 메모를 병렬로 만들고, reduce 호출에 넣을 프롬프트를 돌려준다.
+    반환: (reduce 프롬프트, 링크 목록)
+    """
+    chunks = split_into_chunks(
+        source_name, messages, SUMMARY_CHUNK_TOKENS, SUMMARY_MAX_CHUNKS
+    )
 
-    response = client.responses.create(
-        model="gpt-5-mini",
+    links = []
+
+    async def map_chunk(chunk):
+        combined, chunk_links = _format_messages(chunk)
+        links.extend(chunk_links)
+        response = await _create_async(
+            source_name,
+            model=SUMMARY_MODEL,
+            instructions=MAP_INSTRUCTIONS,
+            input=f"채널 '{source_name}' 메시지:\n\n{combined}",
+        )
+        return (response.output_text or "").strip()
+
+    partials = await asyncio.gather(*[map_chunk(chunk) for chunk in chunks])
+
+    notes = "\n\n".join(f"[메모 {i + 1}]\n{p}" for i, p in enumerate(partials))
+    prompt = f"""
+    아래는 텔레그램 채널 '{source_name}'의 최근 24시간 메시지를 부분별로 정리한 메모다.
+    메모 1이 가장 최근 내용이다.
+
+    메모:
+    {notes}
+    """
+    return prompt, links
+
+
+async def _map_reduce(source_name, messages):
+    """
+    양이 많은 소스용 계층 요약.
+    묶음별 메모를 병렬로 만든 뒤(map), 메모들을 합쳐 최종 리포트를 만든다(reduce).
+    반환: (최종 출력 텍스트, 링크 목록)
+    """
+    prompt, links = await _map_reduce_prompt(source_name, messages)
+
+    response = await _create_async(
+        source_name,
+        model=SUMMARY_MODEL,
+        instructions=INSTRUCTIONS,
         input=prompt,
     )
+    return response.output_text, links
+
+
+def _record_usage(ev, response):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        ev["input_tokens"] = getattr(usage, "input_tokens", 0) or 0
+        ev["output_tokens"] = getattr(usage, "output_tokens", 0) or 0
+
+
+def _create(source_name, **kwargs):
+    with metrics.timer("llm", source=source_name, model=kwargs.get("model")) as ev:
+        response = _get_client().responses.create(**kwargs)
+        _record_usage(ev, response)
+    return response
 
-    out = (response.output_text or "").strip()
+
+async def _create_async(source_name, **kwargs):
+    async with _llm_slot():
+        with metrics.timer("llm", source=source_name, model=kwargs.get("model")) as ev:
+            response = await resilience.retry(
+                lambda: _get_async_client().responses.create(**kwargs),
+                f"LLM {source_name}",
+                retry_on=_transient_errors,
+            )
+            _record_usage(ev, response)
+    return response
+
+
+def _links_section(links):
+    links = _unique_keep_order(links)[:10]
+    if not links:
+        return ""
+    return "원문 출처 링크\n" + "\n".join(links)
+
+
+def _finalize(output_text, links):
+    out = (output_text or "").strip()
 
     # 모델이 만든 링크/링크섹션은 제거하고, 우리가 수집한 링크만 붙인다
     out = _strip_output_links_section(out)
 
-    links = _unique_keep_order(links)[:10]
-    if links:
-        out += "\n\n원문 출처 링크\n" + "\n".join(links)
+    section = _links_section(links)
+    if section:
+        out += "\n\n" + section
+
+    return out
+
+
+def summarize_source(source_name, messages, with_status=False):
+    """
+    with_status=True 이면 (요약, 캐시 적중 여부)를 반환한다.
+    """
+    started = time.perf_counter()
+    tier, model, tokens = route(messages)
+    if tier == "template":
+        out = _render_template(source_name, messages)
+        _record_route(source_name, tier, model, tokens, started)
+        return (out, False) if with_status else out
+
+    cache_key = summary_cache.make_key(source_name, model, PROMPT_VERSION, messages)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return (cached, True) if with_status else cached
+
+    if EXTRACTIVE_COMPRESSION:
+        messages, _ = extractive.compress(source_name, messages)
+    prompt, links = _build_prompt(source_name, messages)
+
+    response = _create(
+        source_name,
+        model=model,
+        instructions=INSTRUCTIONS,
+        input=prompt,
+    )
+
+    out = _finalize(response.output_text, links)
+    summary_cache.put(cache_key, source_name, out)
+    _record_route(source_name, tier, model, tokens, started)
+    return (out, False) if with_status else out
+
+
+async def summarize_source_async(source_name, messages, with_status=False):
+    """
+    summarize_source의 비동기 버전.
+    AsyncOpenAI를 사용하므로 LLM 응답을 기다리는 동안 이벤트 루프(봇 명령 처리)가 멈추지 않는다.
+    양이 SUMMARY_MAP_REDUCE_THRESHOLD 토큰을 넘는 소스는 map-reduce로 요약한다.
+    작은 소스는 route()에 따라 LLM 없이 옮기거나 SUMMARY_FAST_MODEL로 요약한다.
+    EXTRACTIVE_COMPRESSION이 켜져 있으면 캐시에 없는 소스는 프롬프트 전에 정보량이 큰 문장만 남긴다.
+    """
+    started = time.perf_counter()
+    tier, model, tokens = route(messages)
+    if tier == "template":
+        out = _render_template(source_name, messages)
+        _record_route(source_name, tier, model, tokens, started)
+        return (out, False) if with_status else out
+
+    cache_key = summary_cache.make_key(source_name, model, PROMPT_VERSION, messages)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return (cached, True) if with_status else cached
+
+    messages, tokens = await _compressed(source_name, messages, tokens)
+    if tokens > SUMMARY_MAP_REDUCE_THRESHOLD:
+        output_text, links = await _map_reduce(source_name, messages)
+    else:
+        prompt, links = _build_prompt(source_name, messages)
+
+        response = await _create_async(
+            source_name,
+            model=model,
+            instructions=INSTRUCTIONS,
+            input=prompt,
+        )
+        output_text = response.output_text
+
+    out = _finalize(output_text, links)
+    summary_cache.put(cache_key, source_name, out)
+    _record_route(source_name, tier, model, tokens, started)
+    return (out, False) if with_status else out
+
+
+async def summarize_source_stream(source_name, messages, min_chars=None):
+    """
+    LLM 응답을 생성되는 대로 받아 문단 단위 조각으로 내보내는 스트리밍 요약.
+    - ("chunk", 텍스트) 를 여러 번 yield 한 뒤 마지막에 ("done", 전체 요약, 캐시 적중 여부)
+    - 첫 문단은 완성되는 즉시, 이후는 min_chars 이상 모이면 한 조각으로 묶는다
+    - 모델이 쓴 링크는 조각마다 걸러내고, 수집한 링크 섹션은 맨 끝 조각으로 붙인다
+    - 캐시 적중 시, route()가 template을 고른 경우에는 전체 요약 한 조각만 내보낸다
+    """
+    if min_chars is None:
+        min_chars = SUMMARY_STREAM_MIN_CHARS
+
+    started = time.perf_counter()
+    tier, model, tokens = route(messages)
+    if tier == "template":
+        out = _render_template(source_name, messages)
+        _record_route(source_name, tier, model, tokens, started)
+        yield "chunk", out
+        yield "done", out, False
+        return
+
+    cache_key = summary_cache.make_key(source_name, model, PROMPT_VERSION, messages)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        yield "chunk", cached
+        yield "done", cached, True
+        return
+
+    messages, tokens = await _compressed(source_name, messages, tokens)
+    if tokens > SUMMARY_MAP_REDUCE_THRESHOLD:
+        prompt, links = await _map_reduce_prompt(source_name, messages)
+    else:
+        prompt, links = _build_prompt(source_name, messages)
+
+    parts = []
+    buffer = ""
+    flushed = False
+
+    async with _llm_slot():
+        requested = time.perf_counter()
+        with metrics.timer("llm", source=source_name, model=model, stream=True) as ev:
+            stream = await resilience.retry(
+                lambda: _get_async_client().responses.create(
+                    model=model,
+                    instructions=INSTRUCTIONS,
+                    input=prompt,
+                    stream=True,
+                ),
+                f"LLM {source_name}",
+                retry_on=_transient_errors,
+            )
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    if not parts:
+                        ev["first_token_seconds"] = round(time.perf_counter() - requested, 3)
+                    parts.append(event.delta)
+                    buffer += event.delta
+
+                    # 완성된 문단까지만 내보내고 나머지는 다음 delta를 기다린다
+                    cut = buffer.rfind("\n\n")
+                    if cut > 0 and (not flushed or cut >= min_chars):
+                        chunk = _strip_output_links_section(buffer[:cut])
+                        buffer = buffer[cut + 2:]
+                        if chunk:
+                            flushed = True
+                            yield "chunk", chunk
+                elif event.type == "response.completed":
+                    _record_usage(ev, event.response)
+
+    tail = _strip_output_links_section(buffer)
+    if tail:
+        yield "chunk", tail
+
+    section = _links_section(links)
+    if section:
+        yield "chunk", section
+
+    out = _finalize("".join(parts), links)
+    summary_cache.put(cache_key, source_name, out)
+    _record_route(source_name, tier, model, tokens, started)
+    yield "done", out, False
+
+
+async def _summarize_job(key, source_name, messages):
+    return await summarize_source_async(source_name, messages, with_status=True)
+
+
+async def _iter_jobs(jobs):
+    # 리스트와 async generator(수집이 끝나는 대로 작업을 내보내는 파이프라인) 모두 받는다
+    if hasattr(jobs, "__aiter__"):
+        async for job in jobs:
+            yield job
+    else:
+        for job in jobs:
+            yield job
+
+
+@asynccontextmanager
+async def _semaphore_slot(sem):
+    async with sem:
+        yield {}
+
+
+def _slot(scheduler, sem, job):
+    # scheduler(job_scheduler.JobScheduler)가 있으면 실행 순서를 그쪽에 맡긴다
+    if scheduler is not None:
+        return scheduler.slot(*job)
+    return _semaphore_slot(sem)
+
+
+async def summarize_many(jobs, concurrency=4, ordered=True, summarize_fn=None, max_pending=None, scheduler=None):
+    """
+    여러 소스를 동시에 요약한다.
+    - jobs: (key, source_name, messages) 리스트 또는 async iterable
+    - concurrency: 동시에 진행할 LLM 요청 수
+    - ordered=True 이면 jobs 순서대로, False 이면 끝나는 순서대로 (key, summary, cached)를 yield
+    - summarize_fn(key, source_name, messages) -> (summary, cached) 로 요약 방식을 바꿀 수 있다
+    - max_pending: 받아 두고 아직 끝나지 않은 작업 수 상한. 차면 jobs를 더 읽지 않는다 (기본 무제한)
+    - scheduler: 주면 concurrency 대신 scheduler.slot()으로 시작 순서를 정한다 (내보내는 순서는 그대로)
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    pending = asyncio.Semaphore(max_pending) if max_pending else None
+    summarize_fn = summarize_fn or _summarize_job
+    out = asyncio.Queue()
+    tasks = []
+
+    async def run(key, source_name, messages):
+        async with _slot(scheduler, sem, (key, source_name, messages)) as slot:
+            summary, cached = await summarize_fn(key, source_name, messages)
+            slot["measured"] = not cached and summary is not None
+            return key, summary, cached
+
+    async def feed():
+        try:
+            async for job in _iter_jobs(jobs):
+                if pending:
+                    await pending.acquire()
+                task = asyncio.create_task(run(*job))
+                tasks.append(task)
+                if pending:
+                    task.add_done_callback(lambda _: pending.release())
+                if ordered:
+                    out.put_nowait(("task", task))
+                else:
+                    task.add_done_callback(lambda t: out.put_nowait(("task", t)))
+            out.put_nowait(("end", len(tasks)))
+        except Exception as e:
+            out.put_nowait(("error", e))
+
+    feeder = asyncio.create_task(feed())
+
+    try:
+        total = None
+        yielded = 0
+        while total is None or yielded < total:
+            kind, value = await out.get()
+            if kind == "error":
+                raise value
+            if kind == "end":
+                total = value
+                continue
+            yield await value
+            yielded += 1
+    finally:
+        # 소비자가 중간에 멈추거나 예외가 나면 남은 요청은 취소
+        feeder.cancel()
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def _stream_job(key, source_name, messages):
+    async for event in summarize_source_stream(source_name, messages):
+        yield event
+
+
+async def summarize_many_stream(jobs, concurrency=4, stream_fn=None, max_pending=None, scheduler=None):
+    """
+    summarize_many의 스트리밍 버전.
+    - 요약은 concurrency 개씩 동시에 진행하지만, 조각은 항상 jobs 순서대로 내보낸다
+      (앞 소스가 끝나기 전까지 뒤 소스의 조각은 모아 두었다가 차례가 오면 한꺼번에)
+    - (key, 텍스트, 첫 조각 여부, 마지막 조각 여부, 캐시 적중 여부)를 yield
+      마지막 이벤트의 텍스트는 빈 문자열, 요약에 실패했으면("done" 요약이 None) None
+    - stream_fn(key, source_name, messages) 는 summarize_source_stream 형식의 이벤트를 내보내야 한다
+    - jobs / max_pending / scheduler 는 summarize_many와 같다
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    pending = asyncio.Semaphore(max_pending) if max_pending else None
+    stream_fn = stream_fn or _stream_job
+    out = asyncio.Queue()
+    tasks = []
+
+    async def run(job, queue):
+        async with _slot(scheduler, sem, job) as slot:
+            try:
+                async for event in stream_fn(*job):
+                    if event[0] == "done":
+                        slot["measured"] = not event[2] and event[1] is not None
+                    await queue.put(event)
+            except Exception as e:
+                slot["measured"] = False
+                await queue.put(("error", e))
+
+    async def feed():
+        try:
+            async for job in _iter_jobs(jobs):
+                if pending:
+                    await pending.acquire()
+                queue = asyncio.Queue()
+                task = asyncio.create_task(run(job, queue))
+                tasks.append(task)
+                if pending:
+                    task.add_done_callback(lambda _: pending.release())
+                out.put_nowait(("job", (job[0], queue)))
+            out.put_nowait(("end", None))
+        except Exception as e:
+            out.put_nowait(("error", e))
+
+    feeder = asyncio.create_task(feed())
+
+    try:
+        while True:
+            kind, value = await out.get()
+            if kind == "error":
+                raise value
+            if kind == "end":
+                break
 
-    return out
\ No newline at end of file
+            key, queue = value
+            first = True
+            while True:
+                event = await queue.get()
+                if event[0] == "error":
+                    raise event[1]
+                if event[0] == "done":
+                    yield key, ("" if event[1] is not None else None), first, True, event[2]
+                    break
+                yield key, event[1], first, False, False
+                first = False
+    finally:
+        feeder.cancel()
+        for task in tasks:
+            if not task.done():
+                task.cancel()
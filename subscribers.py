@@ -0,0 +1,99 @@
+import time
+import logging
+
+import message_store
+
+logger = logging.getLogger(__name__)
+
+# 스냅샷을 받을 채팅 목록 + 채팅별 전송 결과
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscribers (
+    chat_id  TEXT PRIMARY KEY,
+    title    TEXT,
+    added_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS deliveries (
+    run_id     TEXT NOT NULL,
+    chat_id    TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    sent       INTEGER NOT NULL DEFAULT 0,
+    failed     INTEGER NOT NULL DEFAULT 0,
+    error      TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, chat_id)
+);
+"""
+message_store.register_schema(_SCHEMA)
+
+
+def normalize_chat_id(raw):
+    """숫자 ID(-100...)는 int로, @채널username은 그대로."""
+    if raw is None:
+        return None
+    raw = str(raw).strip()
+    if not raw:
+        return None
+    if raw.lstrip("-").isdigit():
+        return int(raw)
+    return raw
+
+
+def add(chat_id, title=None):
+    conn = message_store.get_conn()
+    conn.execute(
+        "INSERT OR REPLACE INTO subscribers (chat_id, title, added_at) VALUES (?, ?, ?)",
+        (str(chat_id), title, time.time()),
+    )
+    conn.commit()
+
+
+def remove(chat_id):
+    conn = message_store.get_conn()
+    cur = conn.execute("DELETE FROM subscribers WHERE chat_id = ?", (str(chat_id),))
+    conn.commit()
+    return cur.rowcount > 0
+
+
+def list_all():
+    return [
+        {"chat_id": normalize_chat_id(row["chat_id"]), "title": row["title"]}
+        for row in message_store.get_conn().execute("SELECT chat_id, title FROM subscribers ORDER BY added_at")
+    ]
+
+
+def all_chat_ids(default=None):
+    """등록된 구독자 + 기본 채팅(BOT_CHAT_ID). 중복 없이 등록 순서대로."""
+    ids = []
+    if default:
+        ids.append(default)
+    for sub in list_all():
+        if sub["chat_id"] not in ids:
+            ids.append(sub["chat_id"])
+    return ids
+
+
+def record_delivery(run_id, chat_id, status, sent=0, failed=0, error=None):
+    conn = message_store.get_conn()
+    conn.execute(
+        "INSERT OR REPLACE INTO deliveries "
+        "(run_id, chat_id, status, sent, failed, error, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (run_id, str(chat_id), status, sent, failed, error, time.time()),
+    )
+    conn.commit()
+
+
+def last_deliveries():
+    """가장 최근 실행의 채팅별 전송 결과."""
+    conn = message_store.get_conn()
+    row = conn.execute(
+        "SELECT run_id FROM deliveries ORDER BY updated_at DESC LIMIT 1"
+    ).fetchone()
+    if row is None:
+        return None, []
+    rows = conn.execute(
+        "SELECT chat_id, status, sent, failed, error FROM deliveries WHERE run_id = ?",
+        (row["run_id"],),
+    ).fetchall()
+    return row["run_id"], [dict(r) for r in rows]
@@ -0,0 +1,85 @@
+import time
+import hashlib
+import json
+import logging
+
+import message_store
+from config import SUMMARY_CACHE_TTL_HOURS, SUMMARY_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+# 요약 결과 캐시
+# 키 = hash(소스, 모델, 프롬프트 버전, 정규화된 메시지 집합)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summary_cache (
+    key        TEXT PRIMARY KEY,
+    source     TEXT NOT NULL,
+    summary    TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    used_at    REAL NOT NULL
+);
+"""
+message_store.register_schema(_SCHEMA)
+
+
+def make_key(source_name, model, prompt_version, messages):
+    # 다른 소스에서 합쳐진 중복 글의 링크(dup_links)도 출처로 나가므로 키에 넣는다
+    normalized = sorted(
+        (
+            (m.get("text") or "").strip(),
+            (m.get("link") or "").strip(),
+            sorted(link.strip() for link in m.get("dup_links", []) if link),
+        )
+        for m in messages
+    )
+    payload = json.dumps(
+        [source_name, model, prompt_version, normalized],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key):
+    conn = message_store.get_conn()
+    row = conn.execute(
+        "SELECT summary, created_at FROM summary_cache WHERE key = ?", (key,)
+    ).fetchone()
+    if row is None:
+        return None
+
+    now = time.time()
+    if now - row["created_at"] > SUMMARY_CACHE_TTL_HOURS * 3600:
+        conn.execute("DELETE FROM summary_cache WHERE key = ?", (key,))
+        conn.commit()
+        return None
+
+    conn.execute("UPDATE summary_cache SET used_at = ? WHERE key = ?", (now, key))
+    conn.commit()
+    return row["summary"]
+
+
+def put(key, source_name, summary):
+    conn = message_store.get_conn()
+    now = time.time()
+    conn.execute(
+        "INSERT OR REPLACE INTO summary_cache (key, source, summary, created_at, used_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (key, source_name, summary, now, now),
+    )
+    _evict(conn, now)
+    conn.commit()
+
+
+def _evict(conn, now):
+    # TTL 지난 것 삭제 + 개수 초과분은 가장 오래 안 쓴 것부터 삭제
+    conn.execute(
+        "DELETE FROM summary_cache WHERE created_at < ?",
+        (now - SUMMARY_CACHE_TTL_HOURS * 3600,),
+    )
+    cur = conn.execute(
+        "DELETE FROM summary_cache WHERE key NOT IN ("
+        "SELECT key FROM summary_cache ORDER BY used_at DESC LIMIT ?)",
+        (SUMMARY_CACHE_MAX_ENTRIES,),
+    )
+    if cur.rowcount:
+        logger.info("요약 캐시 %s개 정리", cur.rowcount)
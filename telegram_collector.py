@@ -1,25 +1,194 @@
+import asyncio
+import logging
+import time
 from datetime import datetime, timedelta
-from config import KST
 
+import message_store
+import metrics
+import poll_scheduler
+import resilience
+from config import (
+    KST,
+    TELEGRAM_CONCURRENCY,
+    TELEGRAM_MAX_MESSAGES,
+    TELEGRAM_MAX_CHARS,
+    TELEGRAM_FLOOD_RETRIES,
+    TELEGRAM_FETCH_TIMEOUT,
+    STORE_RETENTION_DAYS,
+)
 
-async def collect_telegram(client, channels):
-    cutoff_time = datetime.now(KST) - timedelta(hours=24)
+logger = logging.getLogger(__name__)
 
-    results = []
 
-    for channel in channels:
-        async for message in client.iter_messages(channel):
-            msg_time = message.date.astimezone(KST)
+def _apply_char_budget(items, max_chars):
+    out = []
+    total_chars = 0
+    for item in items:
+        out.append(item)
+        total_chars += len(item["text"])
+        if total_chars >= max_chars:
+            break
+    return out
+
+
+async def _fetch_channel(client, channel, cutoff_time, max_messages, max_chars):
+    with metrics.timer("telegram_fetch", source=channel) as ev:
+        window = await _fetch_channel_window(client, channel, cutoff_time, max_messages, max_chars)
+        ev["messages"] = len(window)
+    return window
+
+
+async def _fetch_channel_window(client, channel, cutoff_time, max_messages, max_chars):
+    # 지난번에 본 마지막 메시지 id 이후 것만 서버에서 받는다
+    last_id = int(message_store.get_state("telegram", channel)["mark"] or 0)
+
+    new_items = []
+    total_chars = 0
+    max_id = last_id
+
+    # limit을 주면 Telethon이 필요한 만큼만(최대 100개 단위) 서버에 요청한다.
+    # 최신 메시지부터 내려오므로 cutoff 이전 메시지를 만나면 바로 중단.
+    async for message in client.iter_messages(channel, limit=max_messages, min_id=last_id):
+        msg_time = message.date.astimezone(KST)
+        max_id = max(max_id, message.id)
 
-            if msg_time < cutoff_time:
+        if msg_time < cutoff_time:
+            break
+
+        if message.text:
+            new_items.append({
+                "source": channel,
+                "key": message.id,
+                "date": msg_time,
+                "text": message.text,
+                "link": f"https://t.me/{message.chat.username}/{message.id}"
+            })
+
+            total_chars += len(message.text)
+            if total_chars >= max_chars:
+                logger.info("%s: 글자 수 한도(%s자) 도달, 수집 조기 종료", channel, max_chars)
                 break
 
-            if message.text:
-                results.append({
-                    "source": channel,
-                    "date": msg_time,
-                    "text": message.text,
-                    "link": f"https://t.me/{message.chat.username}/{message.id}"
-                })
+    message_store.save_messages("telegram", new_items)
+    if max_id > last_id:
+        message_store.set_state("telegram", channel, mark=str(max_id))
+
+    logger.info("%s: 새 메시지 %s개", channel, len(new_items))
+
+    # 24시간 창은 저장소에서 읽는다
+    window = message_store.load_window("telegram", channel, cutoff_time, limit=max_messages)
+    return _apply_char_budget(window, max_chars)
+
+
+async def _collect_channel(client, channel, cutoff_time, sem, max_messages, max_chars):
+    async with sem:
+        # 제한 시간은 세마포어를 얻은 뒤부터 잰다 (차례를 기다린 시간은 채널 실패가 아님)
+        timeout = resilience.stage_timeout(TELEGRAM_FETCH_TIMEOUT)
+        return await asyncio.wait_for(
+            _fetch_with_flood_retry(client, channel, cutoff_time, max_messages, max_chars, timeout),
+            timeout,
+        )
+
+
+async def _fetch_with_flood_retry(client, channel, cutoff_time, max_messages, max_chars, timeout):
+    from telethon.errors import FloodWaitError
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for attempt in range(TELEGRAM_FLOOD_RETRIES + 1):
+        try:
+            return await _fetch_channel(
+                client, channel, cutoff_time, max_messages, max_chars
+            )
+        except FloodWaitError as e:
+            # FloodWait 동안에는 세마포어를 쥔 채로 기다려서 다른 요청도 함께 늦춘다.
+            # 기다려도 제한 시간 안에 다시 못 받으면 바로 포기한다
+            wait = int(getattr(e, "seconds", 5)) + 1
+            left = None if deadline is None else deadline - time.monotonic()
+            if attempt >= TELEGRAM_FLOOD_RETRIES or (left is not None and wait >= left):
+                raise
+            logger.warning("%s: FloodWait 발생. %s초 대기 후 재시도", channel, wait)
+            await asyncio.sleep(wait)
+
+
+async def iter_telegram(
+    client,
+    channels,
+    concurrency=None,
+    max_messages=None,
+    max_chars=None,
+    force=False,
+):
+    """
+    채널들을 동시에(최대 concurrency개) 수집하면서, 채널 하나가 끝날 때마다 (channel, items, error)를 yield.
+    - 저장소의 high-water mark 이후 메시지만 새로 받고, 24시간 창은 저장소에서 읽는다.
+    - 채널당 max_messages개 / max_chars자에 도달하면 더 내려가지 않는다.
+    - 확인 주기(poll_scheduler)가 아직 안 된 채널은 서버에 묻지 않고 저장소만 읽는다 (force=True 이면 모두 확인).
+    - 채널당 TELEGRAM_FETCH_TIMEOUT 안에 못 받거나 실패하면 저장소에 있는 것만 쓰고 error에 사유를 담는다.
+      연속으로 실패하는 채널은 회로 차단기(resilience)가 한동안 건너뛴다.
+    - 끝나는 순서대로 내보내므로 느린 채널을 기다리지 않고 다음 단계로 넘길 수 있다.
+    """
+    cutoff_time = datetime.now(KST) - timedelta(hours=24)
+    message_store.prune(cutoff_time - timedelta(days=STORE_RETENTION_DAYS))
+
+    sem = asyncio.Semaphore(max(1, concurrency or TELEGRAM_CONCURRENCY))
+    max_messages = max_messages or TELEGRAM_MAX_MESSAGES
+    max_chars = max_chars or TELEGRAM_MAX_CHARS
+
+    def stored(channel):
+        window = message_store.load_window("telegram", channel, cutoff_time, limit=max_messages)
+        return _apply_char_budget(window, max_chars)
+
+    async def run(channel):
+        if not poll_scheduler.is_due("telegram", channel, force):
+            metrics.record("poll_skip", 0.0, source=channel)
+            return channel, stored(channel), None
+
+        if resilience.is_open("telegram", channel):
+            metrics.record("circuit_open", 0.0, source=channel)
+            return channel, stored(channel), "연속 실패로 일시 중단"
+
+        try:
+            items = await _collect_channel(client, channel, cutoff_time, sem, max_messages, max_chars)
+        except Exception as e:
+            error = "시간 초과" if isinstance(e, TimeoutError) else type(e).__name__
+            logger.warning("%s: 수집 실패 (%s: %s)", channel, error, e)
+            resilience.record_failure("telegram", channel, error)
+            return channel, stored(channel), error
+
+        resilience.record_success("telegram", channel)
+        poll_scheduler.record_check("telegram", channel)
+        return channel, items, None
+
+    tasks = [asyncio.create_task(run(channel)) for channel in channels]
+
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def collect_telegram(
+    client,
+    channels,
+    concurrency=None,
+    max_messages=None,
+    max_chars=None,
+    force=False,
+):
+    """
+    iter_telegram 결과를 모두 모아 channels 순서대로 합쳐서 반환.
+    """
+    per_channel = {}
+    async for channel, items, _ in iter_telegram(
+        client, channels, concurrency, max_messages, max_chars, force
+    ):
+        per_channel[channel] = items
+
+    results = []
+    for channel in channels:
+        results.extend(per_channel.get(channel, []))
 
-    return results
\ No newline at end of file
+    return results
@@ -0,0 +1,102 @@
+import asyncio
+import tempfile
+from contextlib import ExitStack
+from unittest import mock
+
+import benchmark as B
+
+# 리포트 블록이 자기 섹션(텔레그램/네이버) 아래에 들어가는지 확인.
+# 텔레그램 채널은 메시지가 많아 요약이 늦게 끝나고, 네이버 블로그는 먼저 끝나도록 만든다.
+# 실제 텔레그램/OpenAI 대신 benchmark.py의 가짜 클라이언트를 쓴다.
+
+# 프로젝트 모듈을 import 하기 전에 설정해야 config에 반영된다
+B._setup_env(tempfile.mkdtemp(), B._start_rss_server().server_address[1])
+
+CHANNELS = [f"ch{i}" for i in range(4)]
+BLOGS = {f"b{i}": f"📝 b{i}" for i in range(3)}
+
+
+def _kind_of(text):
+    label = text.split("\n", 1)[0]
+    for kind, tag in (("telegram", "📡 ch"), ("naver", "📝 b")):
+        if tag in label:
+            return kind
+    return None
+
+
+async def _report(ordered, stream):
+    import bot_runner
+    import source_summarizer
+    import summary_cache
+    import user_client
+
+    B._reset_store(tempfile.mkdtemp(), "sections")
+    tg = B.FakeTelegramClient()
+    tg.build(CHANNELS, 60, seed=3)
+    B._feeds.build(list(BLOGS), 3, seed=4)
+    # 입력이 길수록 늦게 끝난다 → 텔레그램 요약이 네이버보다 늦게 끝난다
+    llm = B.FakeLLM(0.05, latency_per_1k=0.1)
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(user_client, "_client", tg))
+        stack.enter_context(mock.patch.object(source_summarizer, "async_client", llm))
+        stack.enter_context(mock.patch.object(source_summarizer, "_llm_limit", None))
+        stack.enter_context(mock.patch.object(bot_runner, "TELEGRAM_CHANNELS", CHANNELS))
+        stack.enter_context(mock.patch.object(bot_runner, "NAVER_BLOGS", BLOGS))
+        # 캐시로 LLM 호출이 가려지지 않도록
+        stack.enter_context(mock.patch.object(summary_cache, "get", lambda key: None))
+
+        return [
+            text async for text in bot_runner.generate_reports_stream(
+                compact=True, ordered=ordered, stream=stream, force=True
+            )
+        ]
+
+
+def _check_sections(texts):
+    # 설정 순서로 보낼 때: 모든 블록이 바로 앞의 섹션 헤더와 같은 종류
+    import bot_runner
+
+    headers = {text: kind for kind, text in bot_runner.SECTION_HEADERS.items()}
+    section = None
+    blocks = 0
+    for text in texts:
+        if text in headers:
+            section = headers[text]
+            continue
+        kind = _kind_of(text)
+        if kind is None:
+            continue  # 스트리밍의 이어지는 조각 (라벨 없음)
+        assert kind == section, (section, text[:40])
+        blocks += 1
+    assert blocks == len(CHANNELS) + len(BLOGS), blocks
+
+
+def test_ordered_blocks_follow_their_header():
+    _check_sections(asyncio.run(_report(ordered=True, stream=False)))
+
+
+def test_streamed_blocks_follow_their_header():
+    _check_sections(asyncio.run(_report(ordered=False, stream=True)))
+
+
+def test_unordered_blocks_carry_their_section():
+    import bot_runner
+
+    texts = asyncio.run(_report(ordered=False, stream=False))
+
+    # 완료 순서에서는 섹션 헤더 없이 블록마다 종류를 붙인다
+    assert not set(texts) & set(bot_runner.SECTION_HEADERS.values())
+    kinds = [_kind_of(text) for text in texts]
+    for kind, text in zip(kinds, texts):
+        assert text.startswith(bot_runner.SECTION_TAGS[kind]), text[:40]
+    assert len(kinds) == len(CHANNELS) + len(BLOGS)
+    # 이 테스트가 의미 있으려면 네이버 블록이 텔레그램 블록보다 먼저 끝나야 한다
+    assert kinds.index("naver") < len(kinds) - kinds[::-1].index("telegram") - 1, kinds
+
+
+if __name__ == "__main__":
+    test_ordered_blocks_follow_their_header()
+    test_streamed_blocks_follow_their_header()
+    test_unordered_blocks_carry_their_section()
+    print("✅ 섹션 헤더 확인 완료")
@@ -0,0 +1,147 @@
+import asyncio
+import tempfile
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from unittest import mock
+
+import benchmark as B
+
+# 스냅샷 실행을 중간에 취소(프로세스 종료와 같은 상황)한 뒤 이어서 보내는지 확인.
+# 실제 텔레그램/OpenAI 대신 benchmark.py의 가짜 클라이언트를 쓴다.
+CHAT_IDS = [-1, -2]
+
+# 프로젝트 모듈을 import 하기 전에 설정해야 config에 반영된다
+B._setup_env(tempfile.mkdtemp(), B._start_rss_server().server_address[1])
+
+
+@contextmanager
+def _fakes():
+    """가짜 클라이언트로 바꿔 끼우고, 끝나면 모듈 전역을 원래대로 되돌린다."""
+    B._reset_store(tempfile.mkdtemp(), "resume")
+
+    import bot_runner
+    import source_summarizer
+    import summary_cache
+    import user_client
+
+    # 네이버 블로그도 취소 전에 요약이 끝나도록 채널 수는 적게
+    channels = [f"ch{i}" for i in range(3)]
+    blogs = {f"b{i}": f"📝 b{i}" for i in range(3)}
+
+    tg = B.FakeTelegramClient()
+    tg.build(channels, 50, seed=1)
+    B._feeds.build(list(blogs), 10, seed=2)
+    llm = B.FakeLLM(0.3)
+    llm.inputs = []
+    llm.gate = None
+    create = llm.create
+
+    async def record_llm(input=None, **kwargs):
+        llm.inputs.append(input or "")
+        # gate가 있으면 앞의 몇 번만 응답하고 나머지는 멈춰 둔다 (중간에 끊긴 실행 흉내)
+        if llm.gate is not None and len(llm.inputs) > 4:
+            await llm.gate.wait()
+        return await create(input=input, **kwargs)
+
+    llm.create = record_llm
+
+    bot = B.FakeBot()
+    sent = []
+    send_message = bot.send_message
+
+    async def record(chat_id, text, **kwargs):
+        sent.append((chat_id, text))
+        return await send_message(chat_id, text, **kwargs)
+
+    bot.send_message = record
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(user_client, "_client", tg))
+        stack.enter_context(mock.patch.object(source_summarizer, "async_client", llm))
+        # 테스트마다 이벤트 루프가 새로 만들어진다
+        stack.enter_context(mock.patch.object(source_summarizer, "_llm_limit", None))
+        stack.enter_context(mock.patch.object(bot_runner, "TELEGRAM_CHANNELS", channels))
+        stack.enter_context(mock.patch.object(bot_runner, "NAVER_BLOGS", blogs))
+        # 캐시로 LLM 호출이 가려지지 않도록
+        stack.enter_context(mock.patch.object(summary_cache, "get", lambda key: None))
+        yield bot, llm, sent
+
+
+async def _cancel_and_resume():
+    import bot_runner
+    import snapshot_checkpoint
+
+    with _fakes() as (bot, llm, sent):
+        llm.gate = asyncio.Event()
+        task = asyncio.create_task(bot_runner.send_morning_snapshot(bot, CHAT_IDS, is_test=True))
+        # 앞의 요약만 끝나고 나머지 LLM 요청이 멈춘 상태에서 끊는다
+        while len(llm.inputs) <= 4:
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(1.0)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+        llm.gate = None
+        sent_before, llm_before = len(sent), len(llm.inputs)
+        runs = snapshot_checkpoint.interrupted(3)
+        assert len(runs) == 1, runs
+        summarized = runs[0].summarized
+        assert len(summarized) < len(bot_runner.TELEGRAM_CHANNELS) + len(bot_runner.NAVER_BLOGS)
+        # 두 종류 모두 요약이 끝난 소스가 있어야 아래 확인이 의미 있다
+        assert {kind for kind, _ in summarized} == {"telegram", "naver"}, summarized
+        print(f"취소 전: 메시지 {sent_before}개, LLM {llm_before}회, 요약 완료 소스 {len(summarized)}개")
+
+        await bot_runner._resume_interrupted_snapshots(bot)
+        print(f"이어서 보낸 뒤: 메시지 {len(sent)}개, LLM {len(llm.inputs) - llm_before}회 추가")
+
+        # 같은 조각이 두 번 나가지 않고, 두 채팅 모두 마무리 메시지까지 받는다
+        duplicates = [k for k, v in Counter(sent).items() if v > 1]
+        assert not duplicates, duplicates
+        for chat_id in CHAT_IDS:
+            texts = [text for c, text in sent if c == chat_id]
+            assert texts[0].startswith("🗞️ Morning Snapshot"), texts[0]
+            assert texts[-1].startswith("☀️ 좋은 하루 보내세요."), texts[-1]
+
+        # 이미 요약이 끝난 소스는 다시 요약하지 않는다 (프롬프트에는 채널명 / 블로그 id가 들어간다)
+        names = {source for _, source in summarized}
+        assert all(any(f"'{name}'" in prompt for prompt in llm.inputs[:llm_before]) for name in names)
+        for prompt in llm.inputs[llm_before:]:
+            assert not any(f"'{name}'" in prompt for name in names), prompt[:80]
+        assert snapshot_checkpoint.interrupted(3) == []
+
+
+async def _failed_run_is_not_resumed():
+    import bot_runner
+    import snapshot_checkpoint
+
+    async def broken(*args, **kwargs):
+        raise RuntimeError("요약 실패")
+        yield
+
+    with _fakes() as (bot, _, _), mock.patch.object(bot_runner, "generate_reports_stream", broken):
+        try:
+            await bot_runner.send_morning_snapshot(bot, CHAT_IDS, is_test=True)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("예외가 전달되지 않음")
+
+        # 예외로 끝난 실행은 failed로 닫혀 재시작 후 이어서 보내지 않는다
+        assert snapshot_checkpoint.interrupted(3) == []
+
+
+def test_cancel_and_resume():
+    asyncio.run(_cancel_and_resume())
+
+
+def test_failed_run_is_not_resumed():
+    asyncio.run(_failed_run_is_not_resumed())
+
+
+if __name__ == "__main__":
+    test_cancel_and_resume()
+    test_failed_run_is_not_resumed()
+    print("✅ 스냅샷 취소 후 이어서 보내기 확인 완료")
@@ -1,5 +1,7 @@
 import os
+import asyncio
 from dotenv import load_dotenv
+import user_client
 from telegram_collector import collect_telegram
 from config import TELEGRAM_CHANNELS
 from source_summarizer import summarize_source
@@ -11,19 +13,24 @@ api_id = int(os.getenv("TG_API_ID"))
 api_hash = os.getenv("TG_API_HASH")
 session_name = os.getenv("TG_SESSION")
 
-data = collect_telegram(
-    TELEGRAM_CHANNELS,
-    api_id,
-    api_hash,
-    session_name
-)
 
-grouped = defaultdict(list)
+async def main():
+    user_client.configure(session_name, api_id, api_hash)
+    try:
+        async with user_client.acquire() as client:
+            data = await collect_telegram(client, TELEGRAM_CHANNELS)
+    finally:
+        await user_client.stop()
 
-for item in data:
-    grouped[item["source"]].append(item["text"])
+    grouped = defaultdict(list)
 
-for source, messages in grouped.items():
-    print(f"\n===== {source} 요약 시작 =====\n")
-    summary = summarize_source(source, messages)
-    print(summary)
\ No newline at end of file
+    for item in data:
+        grouped[item["source"]].append(item)
+
+    for source, messages in grouped.items():
+        print(f"\n===== {source} 요약 시작 =====\n")
+        summary = summarize_source(source, messages)
+        print(summary)
+
+
+asyncio.run(main())
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# 봇 프로세스 전체에서 하나만 쓰는 Telethon 사용자 클라이언트.
+# 처음 필요할 때(또는 post_init의 백그라운드 예열에서) 연결하고, post_shutdown에서 종료한다.
+# 모든 핸들러/잡이 공유한다.
+_client = None
+_params = None
+_lock = asyncio.Lock()
+
+
+def configure(session_name, api_id, api_hash):
+    global _params
+    _params = (session_name, api_id, api_hash)
+
+
+async def start():
+    global _client
+    if _client is None:
+        if _params is None:
+            raise RuntimeError("user_client.configure()가 먼저 호출되어야 합니다.")
+
+        # telethon은 실제로 연결할 때 불러온다 (봇 폴링 시작을 늦추지 않도록)
+        from telethon import TelegramClient
+        _client = TelegramClient(*_params, auto_reconnect=True)
+
+    if not _client.is_connected():
+        await _client.start()
+        logger.info("✅ Telethon 사용자 클라이언트 연결")
+
+    return _client
+
+
+async def stop():
+    global _client
+    if _client is not None:
+        await _client.disconnect()
+        logger.info("Telethon 사용자 클라이언트 종료")
+    _client = None
+
+
+@asynccontextmanager
+async def acquire():
+    """
+    공유 클라이언트를 빌려준다.
+    - 연결이 끊겨 있으면 다시 연결
+    - 동시에 들어온 수집 실행은 순서대로 처리 (저장소 high-water mark가 꼬이지 않도록)
+    """
+    async with _lock:
+        client = await start()
+        yield client